@@ -0,0 +1,104 @@
+# adaptive.py
+# Computerized adaptive testing over the question bank: after each answer, pick the unanswered
+# question that most reduces uncertainty about the top-3 functions and the recommended level,
+# and stop once both are stable.
+#
+# Unanswered questions are imputed with the respondent's (shrunken) mean answer, and their
+# spread around it with the respondent's answer variance. Each decision the results page shows
+# is a contrast between two scores -- neighbouring functions in the top-4 ranking, and
+# seniority against its nearest level cut-off -- whose remaining variance comes only from
+# unanswered items. A contrast is stable once its margin exceeds STABILITY_Z standard deviations.
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import numpy as np
+
+from scoring import (
+    LEVEL_THRESHOLDS,
+    SENIORITY_WEIGHTS,
+    AnswerCodes,
+    ScoreResult,
+    ScoringModel,
+    _normalize_array,
+)
+from questions import LEVEL_DIMS
+
+MIN_ITEMS = 12
+STABILITY_Z = 1.64
+# Prior for a respondent's answers: pseudo-observations at Neutral with the variance of a uniform 1-5 answer.
+PRIOR_WEIGHT = 4.0
+PRIOR_MEAN = 3.0
+PRIOR_VAR = 2.0
+
+@dataclass
+class AdaptiveState:
+    values: np.ndarray
+    answered: np.ndarray
+    variance: float
+    function_scores: np.ndarray
+    seniority: float
+    loadings: np.ndarray
+    margins: np.ndarray
+    spread: np.ndarray
+
+    @property
+    def stable(self) -> bool:
+        if self.answered.all():
+            return True
+        return bool(self.answered.sum() >= MIN_ITEMS and np.all(self.margins > STABILITY_Z * np.sqrt(self.spread)))
+
+def _codes(codes: AnswerCodes) -> np.ndarray:
+    return np.frombuffer(codes, dtype=np.uint8) if not isinstance(codes, np.ndarray) else codes
+
+def impute(codes: AnswerCodes) -> Tuple[np.ndarray, np.ndarray, float]:
+    """Per-question values with unanswered items at the respondent's shrunken mean, plus the answer variance."""
+    codes = _codes(codes).astype(np.float64)
+    answered = codes > 0
+    n = answered.sum()
+    given = codes[answered]
+    mean = (given.sum() + PRIOR_WEIGHT * PRIOR_MEAN) / (n + PRIOR_WEIGHT)
+    variance = (((given - mean) ** 2).sum() + PRIOR_WEIGHT * PRIOR_VAR) / (n + PRIOR_WEIGHT)
+    return np.where(answered, codes, mean), answered, float(variance)
+
+def _seniority_loadings(model: ScoringModel) -> np.ndarray:
+    per_dim = np.divide(100.0 * model.level_w, model.level_max, out=np.zeros_like(model.level_w), where=model.level_max > 0)
+    coef = np.array([SENIORITY_WEIGHTS.get(d, 0.0) for d in LEVEL_DIMS])
+    return per_dim @ coef
+
+def assess(model: ScoringModel, codes: AnswerCodes) -> AdaptiveState:
+    values, answered, variance = impute(codes)
+    func = _normalize_array(values @ model.func_w, model.func_max)
+    level = _normalize_array(values @ model.level_w, model.level_max)
+    seniority = float(sum(w * level[LEVEL_DIMS.index(d)] for d, w in SENIORITY_WEIGHTS.items()))
+
+    # Per-question loadings onto each contrast (questions x contrasts).
+    func_load = np.divide(100.0 * model.func_w, model.func_max, out=np.zeros_like(model.func_w), where=model.func_max > 0)
+    order = np.argsort(-func, kind="stable")[: min(4, len(func))]
+    columns = [func_load[:, a] - func_load[:, b] for a, b in zip(order[:-1], order[1:])]
+    margins = [func[a] - func[b] for a, b in zip(order[:-1], order[1:])]
+
+    cutoffs = np.array([cutoff for cutoff, _ in LEVEL_THRESHOLDS])
+    columns.append(_seniority_loadings(model))
+    margins.append(float(np.min(np.abs(seniority - cutoffs))))
+
+    loadings = np.column_stack(columns)
+    spread = variance * (loadings[~answered] ** 2).sum(axis=0)
+    return AdaptiveState(values, answered, variance, func, seniority, loadings, np.array(margins), spread)
+
+def next_question(model: ScoringModel, codes: AnswerCodes) -> Optional[int]:
+    """Bank position of the next question to ask, or None when the assessment can stop."""
+    state = assess(model, codes)
+    if state.stable:
+        return None
+    # Expected variance removed from each contrast, weighted towards the contrasts closest to flipping.
+    urgency = 1.0 / (state.margins ** 2 + state.spread + 1e-9)
+    gain = (state.loadings ** 2) @ urgency
+    gain[state.answered] = -np.inf
+    return int(np.argmax(gain))
+
+def score_adaptive(model: ScoringModel, codes: AnswerCodes) -> ScoreResult:
+    """Score a possibly partial answer set with unanswered questions imputed at the respondent's mean."""
+    values, _, _ = impute(codes)
+    return model.score_values(values)
@@ -1,173 +1,307 @@
 # app.py
 from __future__ import annotations
 
-import json
-from datetime import datetime
+import functools
+import hashlib
+import os
+import time
+from typing import Callable, Dict, Optional
+
+_IMPORT_STARTED = time.perf_counter()
 
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
 
-from questions import QUESTIONS, LIKERT
-from scoring import compute_scores
+# pandas and matplotlib are imported lazily on the results/export path (see charts.py, exports.py).
+import perf
+from bank import BANK, QuestionBank
+from charts import bar_chart
+from exports import answers_csv, results_json
+from questions import LIKERT
+from adaptive import next_question, score_adaptive
+from quality import check as check_quality
+from scoring import LEVEL_LABELS, ScoreAccumulator, ScoreResult, ScoringModel, answers_fingerprint, decode_answers, get_model
+
+# Seconds spent importing this module and its dependencies; reported by coldstart.py.
+IMPORT_SECONDS = time.perf_counter() - _IMPORT_STARTED
 
 APP_TITLE = "HR Career Fit Analyzer"
 APP_TAGLINE = "60-question assessment to discover your best-fit HR function(s) and recommended level."
 
+# Stylesheet served as a static asset (see .streamlit/config.toml), or inlined when that is off.
+BRAND_CSS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "brand.css")
+
+# Question cards formatted and minified once per question text.
+QUESTION_CARD_CACHE = 1024
+
+# Questions per page in paged mode; each page is one st.form, so it costs one rerun to submit.
+PAGE_SIZE = 10
+
+# Distinct answer sets whose results are shared across sessions (e.g. all-Neutral submissions).
+RESULT_CACHE_ENTRIES = 4096
+
+# Results-page wording for the response-quality flags of quality.py.
+QUALITY_NOTES = {
+    "straight_lining": "most statements got the same answer",
+    "long_string": "long runs of identical answers",
+    "inconsistent": "very similar statements were answered very differently",
+    "speeder": "many questions were answered in under a second",
+    "incomplete": "many questions were left unanswered",
+}
+
+# Optional external bank (see bank_store.py); defaults to the built-in questions.QUESTIONS.
+BANK_PATH = os.environ.get("HRFIT_BANK")
+
+@st.cache_resource(show_spinner=False)
+def _bank_loader():
+    from bank_store import BankLoader
+
+    return BankLoader(BANK_PATH)
+
+# Optional SQLite result store (see store.py); every distinct finished answer set is recorded.
+STORE_PATH = os.environ.get("HRFIT_STORE")
+
+@st.cache_resource(show_spinner=False)
+def _result_store():
+    from store import ResultStore
+
+    return ResultStore(STORE_PATH)
+
+# Percentile norms (see norms.py): a prebuilt HRFIT_NORMS file, else whatever the result store holds.
+NORMS_PATH = os.environ.get("HRFIT_NORMS")
+
+# Reference profiles for the "closest roles" card (see matching.py): a prebuilt HRFIT_PROFILES
+# index, e.g. of past high performers, else one profile per function and level derived from the bank.
+PROFILES_PATH = os.environ.get("HRFIT_PROFILES")
+
+@st.cache_resource(show_spinner=False)
+def _profile_index(bank_version: str):
+    from matching import ProfileIndex, role_profiles
+
+    if PROFILES_PATH:
+        return ProfileIndex.load(PROFILES_PATH)
+    return ProfileIndex.build(*role_profiles(_scoring_model()))
+
+@st.cache_resource(show_spinner=False)
+def _norms():
+    from norms import Norms
+
+    if NORMS_PATH:
+        return Norms.load(NORMS_PATH)
+    if STORE_PATH:
+        return Norms.from_store(_result_store())
+    return None
+
+def _bank() -> QuestionBank:
+    return _bank_loader().get() if BANK_PATH else BANK
+
+def _scoring_model() -> ScoringModel:
+    # get_model compiles once per bank object, so every session shares one model until a reload.
+    return get_model(_bank())
+
+def _minify(html: str) -> str:
+    return " ".join(line.strip() for line in html.splitlines() if line.strip())
+
+@functools.lru_cache(maxsize=2)
+def _brand_css_fragment(static: bool) -> str:
+    # Static serving: a one-line @import the browser resolves once and caches (versioned by content);
+    # otherwise the stylesheet is inlined, read and minified once per process.
+    with open(BRAND_CSS, "rb") as f:
+        raw = f.read()
+    if static:
+        version = hashlib.sha1(raw).hexdigest()[:10]
+        return f'<style>@import url("app/static/brand.css?v={version}");</style>'
+    return f"<style>{_minify(raw.decode('utf-8'))}</style>"
+
 def _brand_css() -> None:
-    st.markdown(
-        """
-        <style>
-          :root{
-            --bg:#f6f7fb;
-            --card:#ffffff;
-            --text:#0f172a;
-            --muted:#64748b;
-            --border:#e2e8f0;
-            --accent:#0ea5e9;
-          }
-          .stApp{ background: var(--bg); }
-          .pv-wrap{ max-width: 980px; margin: 0 auto; }
-          .pv-hero{
-            background: linear-gradient(135deg, #ffffff 0%, #f8fafc 100%);
-            border: 1px solid var(--border);
-            border-radius: 18px;
-            padding: 18px;
-            box-shadow: 0 10px 30px rgba(2,6,23,0.06);
-          }
-          .pv-title{ font-size: 28px; font-weight: 800; margin: 0; color: var(--text); }
-          .pv-sub{ margin-top: 6px; color: var(--muted); font-size: 14px; }
-          .pv-card{
-            background: var(--card);
-            border: 1px solid var(--border);
-            border-radius: 18px;
-            padding: 16px;
-            box-shadow: 0 10px 30px rgba(2,6,23,0.05);
-          }
-          .pv-kpi{
-            border: 1px solid var(--border);
-            border-radius: 14px;
-            padding: 12px;
-            background: #ffffff;
-          }
-          .pv-muted{ color: var(--muted); font-size: 13px; }
-          .pv-badge{
-            display:inline-block;
-            padding: 6px 10px;
-            border-radius: 999px;
-            border: 1px solid var(--border);
-            font-size: 12px;
-            color: var(--text);
-            background: #fff;
-            margin-right: 6px;
-          }
-          .pv-divider{ height: 1px; background: var(--border); margin: 12px 0; }
-          .pv-small{ font-size: 12px; color: var(--muted); }
-        </style>
-        """,
-        unsafe_allow_html=True,
-    )
+    st.markdown(_brand_css_fragment(bool(st.get_option("server.enableStaticServing"))), unsafe_allow_html=True)
 
 def _init_state() -> None:
-    st.session_state.setdefault("started", False)
-    st.session_state.setdefault("idx", 0)
-    st.session_state.setdefault("answers", {})
+    version = _scoring_model().version
+    if st.session_state.get("bank_version") != version:
+        # New session, or the bank was hot-reloaded: answers are positional, so start over.
+        _reset()
+        st.session_state.bank_version = version
 
 def _reset() -> None:
     st.session_state.started = False
+    st.session_state.adaptive = False
+    st.session_state.paged = False
+    # idx is the step in `order`, the sequence of bank positions asked (all of them, or the adaptive picks so far).
     st.session_state.idx = 0
-    st.session_state.answers = {}
-
-def _header() -> None:
-    st.markdown('<div class="pv-wrap">', unsafe_allow_html=True)
-    st.markdown(
+    st.session_state.order = list(range(len(_bank())))
+    # One uint8 per question in bank order: 0 = unanswered, 1-5 = index into LIKERT plus one.
+    st.session_state.answers = bytearray(len(_bank()))
+    st.session_state.scorer = ScoreAccumulator(_scoring_model())
+    # Seconds spent on each question in bank order (0 = not timed), for the speeder check in quality.py.
+    st.session_state.seconds = [0.0] * len(_bank())
+    st.session_state.shown = None
+
+# Static page fragments, built once per process.
+_HEADER_HTML = _minify(
+    f"""
+    <div class="pv-hero">
+      <div class="pv-title">{APP_TITLE}</div>
+      <div class="pv-sub">{APP_TAGLINE}</div>
+      <div class="pv-divider"></div>
+      <span class="pv-badge">General HR • Global-friendly</span>
+      <span class="pv-badge">10 HR Tracks</span>
+      <span class="pv-badge">Traits + Level Scoring</span>
+    </div>
+    """
+)
+_FOOTER_HTML = _minify(
+    """
+    <div class="pv-wrap">
+      <div class="pv-small">
+        Tip: Answer honestly — there are no “right” answers. The goal is role-fit, not perfection.
+      </div>
+    </div>
+    </div>
+    """
+)
+_INTRO_HTML = _minify(
+    """
+    <div class="pv-card pv-wrap">
+      <h3 style="margin:0 0 8px 0;">How it works</h3>
+      <div class="pv-muted">
+        • You will answer 60 statements using a 5-point scale.<br/>
+        • The tool matches your answers to 10 HR functions + 6 work-style traits.<br/>
+        • At the end, you will receive your top 3 HR tracks and a recommended level.
+      </div>
+      <div class="pv-divider"></div>
+      <div class="pv-muted"><b>Estimated time:</b> 6–10 minutes</div>
+    </div>
+    """
+)
+
+@functools.lru_cache(maxsize=QUESTION_CARD_CACHE)
+def _question_card(text: str) -> str:
+    return _minify(
         f"""
-        <div class="pv-hero">
-          <div class="pv-title">{APP_TITLE}</div>
-          <div class="pv-sub">{APP_TAGLINE}</div>
-          <div class="pv-divider"></div>
-          <span class="pv-badge">General HR • Global-friendly</span>
-          <span class="pv-badge">10 HR Tracks</span>
-          <span class="pv-badge">Traits + Level Scoring</span>
+        <div class="pv-card">
+          <div style="font-size:18px;font-weight:700;color:#0f172a;margin-bottom:10px;">
+            {text}
+          </div>
+          <div class="pv-muted">Select the option that best describes you.</div>
         </div>
-        """,
-        unsafe_allow_html=True,
+        """
     )
+
+def _header() -> None:
+    st.markdown('<div class="pv-wrap">', unsafe_allow_html=True)
+    st.markdown(_HEADER_HTML, unsafe_allow_html=True)
     st.write("")
 
 def _footer() -> None:
-    st.markdown(
-        """
-        <div class="pv-wrap">
-          <div class="pv-small">
-            Tip: Answer honestly — there are no “right” answers. The goal is role-fit, not perfection.
-          </div>
-        </div>
-        </div>
-        """,
-        unsafe_allow_html=True,
-    )
+    st.markdown(_FOOTER_HTML, unsafe_allow_html=True)
 
 def _intro() -> None:
-    st.markdown(
-        """
-        <div class="pv-card pv-wrap">
-          <h3 style="margin:0 0 8px 0;">How it works</h3>
-          <div class="pv-muted">
-            • You will answer 60 statements using a 5-point scale.<br/>
-            • The tool matches your answers to 10 HR functions + 6 work-style traits.<br/>
-            • At the end, you will receive your top 3 HR tracks and a recommended level.
-          </div>
-          <div class="pv-divider"></div>
-          <div class="pv-muted"><b>Estimated time:</b> 6–10 minutes</div>
-        </div>
-        """,
-        unsafe_allow_html=True,
-    )
+    st.markdown(_INTRO_HTML, unsafe_allow_html=True)
     st.write("")
     c1, c2 = st.columns(2)
     with c1:
-        if st.button("Start Assessment", use_container_width=True, type="primary"):
-            st.session_state.started = True
-            st.session_state.idx = 0
+        st.button("Start Assessment", use_container_width=True, type="primary", on_click=_start)
     with c2:
         st.button("Reset", use_container_width=True, on_click=_reset)
+    st.checkbox("Adaptive mode: ask only the questions needed and stop once results are stable", key="adaptive_opt")
+    st.checkbox(f"Paged mode: answer {PAGE_SIZE} questions per page", key="paged_opt")
+    if STORE_PATH:
+        st.markdown('<div class="pv-small"><a href="?view=analytics" target="_self">Cohort analytics</a></div>', unsafe_allow_html=True)
+
+def _start() -> None:
+    st.session_state.started = True
+    st.session_state.idx = 0
+    st.session_state.adaptive = st.session_state.get("adaptive_opt", False)
+    # Adaptive mode picks one question at a time, so it takes precedence over paging.
+    st.session_state.paged = st.session_state.get("paged_opt", False) and not st.session_state.adaptive
+    st.session_state.reruns_at_start = st.session_state.reruns
+    st.session_state.pop("assessment_reruns", None)
+    if st.session_state.adaptive:
+        st.session_state.order = [next_question(_scoring_model(), st.session_state.answers)]
+
+def _mark_shown(idx: int) -> None:
+    # Start the clock the first time a question (or page) is rendered, not on every fragment rerun.
+    if st.session_state.shown is None or st.session_state.shown[0] != idx:
+        st.session_state.shown = (idx, time.monotonic())
+
+def _record_dwell() -> None:
+    # Charge the time since the current question or page was shown; a page's time is split evenly.
+    shown = st.session_state.shown
+    if shown is None:
+        return
+    idx, since = shown
+    positions = st.session_state.order[idx : idx + (PAGE_SIZE if st.session_state.paged else 1)]
+    for pos in positions:
+        st.session_state.seconds[pos] += (time.monotonic() - since) / len(positions)
+    st.session_state.shown = None
 
 def _go_back() -> None:
+    _record_dwell()
     st.session_state.idx = max(0, st.session_state.idx - 1)
 
 def _go_next() -> None:
-    st.session_state.idx = min(len(QUESTIONS) - 1, st.session_state.idx + 1)
+    _record_dwell()
+    order = st.session_state.order
+    if st.session_state.adaptive and st.session_state.idx + 1 >= len(order):
+        nxt = next_question(_scoring_model(), st.session_state.answers)
+        if nxt is None:
+            _go_results()
+            return
+        order.append(nxt)
+    st.session_state.idx = min(len(order) - 1, st.session_state.idx + 1)
 
 def _go_results() -> None:
-    st.session_state.idx = len(QUESTIONS)
+    st.session_state.idx = len(st.session_state.order)
+
+def _back_to_review() -> None:
+    last = max(0, len(st.session_state.order) - 1)
+    # Paged mode returns to the start of the last page so Back keeps pages aligned.
+    st.session_state.idx = last // PAGE_SIZE * PAGE_SIZE if st.session_state.paged else last
 
+def _finish() -> None:
+    _record_dwell()
+    _go_results()
+
+# A fragment: answering or paging through questions reruns only this view, so the header, CSS and
+# footer are not re-sent for every click.
+@st.fragment
+@perf.traced("question_view")
 def _question_view() -> None:
+    if not st.session_state.get("full_run"):
+        # A fragment-only rerun never reaches main(), so count it here.
+        st.session_state.reruns += 1
+        st.session_state.fragment_reruns = st.session_state.get("fragment_reruns", 0) + 1
+    if not st.session_state.started or st.session_state.idx >= len(st.session_state.order):
+        # Reset or Finish from inside the fragment: hand over to a full-page rerun.
+        st.rerun()
     idx = st.session_state.idx
-    q = QUESTIONS[idx]
-    total = len(QUESTIONS)
+    bank = _bank()
+    pos = st.session_state.order[idx]
+    q = bank[pos]
+    total = len(bank)
+    adaptive = st.session_state.adaptive
+    _mark_shown(idx)
 
     st.markdown('<div class="pv-wrap">', unsafe_allow_html=True)
     st.progress(idx / total)
-    st.markdown(f"<div class='pv-muted'>Question <b>{idx+1}</b> of <b>{total}</b></div>", unsafe_allow_html=True)
+    if adaptive:
+        st.markdown(f"<div class='pv-muted'>Question <b>{idx+1}</b> · adaptive, ends once your results are stable</div>", unsafe_allow_html=True)
+    else:
+        st.markdown(f"<div class='pv-muted'>Question <b>{idx+1}</b> of <b>{total}</b></div>", unsafe_allow_html=True)
     st.write("")
 
-    st.markdown(
-        f"""
-        <div class="pv-card">
-          <div style="font-size:18px;font-weight:700;color:#0f172a;margin-bottom:10px;">
-            {q['text']}
-          </div>
-          <div class="pv-muted">Select the option that best describes you.</div>
-        </div>
-        """,
-        unsafe_allow_html=True,
-    )
+    st.markdown(_question_card(q.text), unsafe_allow_html=True)
     st.write("")
 
-    current = st.session_state.answers.get(q["id"], "Neutral")
-    choice = st.radio("", options=LIKERT, index=LIKERT.index(current) if current in LIKERT else 2)
-    st.session_state.answers[q["id"]] = choice
+    current = st.session_state.answers[pos]
+    choice = st.radio("", options=LIKERT, index=current - 1 if current else 2)
+    code = LIKERT.index(choice) + 1
+    if current != code:
+        st.session_state.answers[pos] = code
+        st.session_state.scorer.set_code(pos, code)
+
+    top_name, top_score = st.session_state.scorer.preview()
+    st.markdown(f"<div class='pv-small'>Current top match: <b>{top_name}</b> ({top_score:.0f}%)</div>", unsafe_allow_html=True)
 
     st.write("")
     b1, b2, b3 = st.columns(3)
@@ -179,14 +313,117 @@ def _question_view() -> None:
         if idx < total - 1:
             st.button("Next", use_container_width=True, on_click=_go_next)
         else:
-            st.button("Finish & See Results", use_container_width=True, type="primary", on_click=_go_results)
+            st.button("Finish & See Results", use_container_width=True, type="primary", on_click=_finish)
+
+    st.markdown("</div>", unsafe_allow_html=True)
+
+def _commit_page(step: int) -> None:
+    # Form callback: copy the page's radio values into the answer codes in one go, then move.
+    _record_dwell()
+    order, idx = st.session_state.order, st.session_state.idx
+    answers, scorer = st.session_state.answers, st.session_state.scorer
+    for pos in order[idx : idx + PAGE_SIZE]:
+        code = LIKERT.index(st.session_state[f"page_q{pos}"]) + 1
+        if answers[pos] != code:
+            answers[pos] = code
+            scorer.set_code(pos, code)
+    if step > 0 and idx + PAGE_SIZE >= len(order):
+        _go_results()
+    else:
+        st.session_state.idx = min(max(0, idx + step * PAGE_SIZE), len(order) - 1)
+
+@perf.traced("page_view")
+def _page_view() -> None:
+    idx = st.session_state.idx
+    bank = _bank()
+    total = len(bank)
+    positions = st.session_state.order[idx : idx + PAGE_SIZE]
+    pages = -(-total // PAGE_SIZE)
+    last = idx + PAGE_SIZE >= total
+    _mark_shown(idx)
+
+    st.markdown('<div class="pv-wrap">', unsafe_allow_html=True)
+    st.progress(idx / total)
+    st.markdown(
+        f"<div class='pv-muted'>Page <b>{idx // PAGE_SIZE + 1}</b> of <b>{pages}</b> · "
+        f"questions {idx + 1}–{idx + len(positions)} of {total}</div>",
+        unsafe_allow_html=True,
+    )
+    if idx:
+        top_name, top_score = st.session_state.scorer.preview()
+        st.markdown(f"<div class='pv-small'>Current top match: <b>{top_name}</b> ({top_score:.0f}%)</div>", unsafe_allow_html=True)
+    st.write("")
+
+    # Radio changes inside a form don't rerun the script; the page is committed once on submit.
+    with st.form(f"page_{idx}"):
+        for pos in positions:
+            current = st.session_state.answers[pos]
+            st.radio(bank[pos].text, options=LIKERT, index=current - 1 if current else 2, key=f"page_q{pos}", horizontal=True)
+        b1, b2 = st.columns(2)
+        with b1:
+            st.form_submit_button("Back", use_container_width=True, disabled=(idx == 0), on_click=_commit_page, args=(-1,))
+        with b2:
+            st.form_submit_button(
+                "Finish & See Results" if last else "Next Page",
+                use_container_width=True,
+                type="primary" if last else "secondary",
+                on_click=_commit_page,
+                args=(1,),
+            )
+    st.button("Reset", use_container_width=True, on_click=_reset)
 
     st.markdown("</div>", unsafe_allow_html=True)
 
+@st.cache_data(max_entries=RESULT_CACHE_ENTRIES, show_spinner=False)
+def _shared_result(bank_version: str, answers_key: str, adaptive: bool, _answers: bytes) -> ScoreResult:
+    # Keyed only on the hashes and mode; the underscore keeps Streamlit from hashing the answers again.
+    with perf.timed("compute_scores"):
+        if adaptive:
+            return score_adaptive(_scoring_model(), _answers)
+        return _scoring_model().score(_answers)
+
+def _current_result() -> ScoreResult:
+    key = (_scoring_model().version, answers_fingerprint(st.session_state.answers), st.session_state.adaptive)
+    if st.session_state.get("result_key") != key:
+        st.session_state.result = _shared_result(*key, bytes(st.session_state.answers))
+        st.session_state.result_key = key
+        st.session_state.exports = {}
+        if STORE_PATH:
+            try:
+                _result_store().record(
+                    st.session_state.result,
+                    st.session_state.answers,
+                    cohort=st.query_params.get("cohort", ""),
+                    bank_version=_scoring_model().version,
+                )
+            except Exception:
+                # The store's writer failed (and logged why); reopen it for later submissions.
+                _result_store.clear()
+                st.warning("Your results could not be saved for cohort analytics.")
+        norms = _norms() if NORMS_PATH or STORE_PATH else None
+        if norms is not None:
+            norms.add_result(st.session_state.result)
+    return st.session_state.result
+
+def _lazy_export(kind: str, build: Callable[[], str]) -> Callable[[], str]:
+    # Streamlit calls this on its own thread only when the button is clicked; the payload is then
+    # kept for the current answer set, which _current_result() resets when the answers change.
+    cache = st.session_state.setdefault("exports", {})
+
+    def payload() -> str:
+        if kind not in cache:
+            cache[kind] = build()
+        return cache[kind]
+    return payload
+
+@perf.traced("results_view")
 def _results_view() -> None:
     st.markdown('<div class="pv-wrap">', unsafe_allow_html=True)
 
-    result = compute_scores(QUESTIONS, st.session_state.answers)
+    result = _current_result()
+    norms = _norms() if NORMS_PATH or STORE_PATH else None
+    if norms is not None and not norms.ready:
+        norms = None
 
     st.markdown(
         """
@@ -200,6 +437,17 @@ def _results_view() -> None:
     )
     st.write("")
 
+    flags = check_quality(_scoring_model(), st.session_state.answers, st.session_state.seconds)
+    if st.session_state.adaptive:
+        # Adaptive mode skips questions on purpose.
+        flags = [f for f in flags if f != "incomplete"]
+    if flags:
+        st.warning(
+            "These results may not reflect your preferences: "
+            + "; ".join(QUALITY_NOTES[f] for f in flags)
+            + ". Consider retaking the assessment and answering each statement on its own."
+        )
+
     cols = st.columns(3)
     for i, (name, score) in enumerate(result.top_functions):
         with cols[i]:
@@ -209,7 +457,7 @@ def _results_view() -> None:
                   <div class="pv-muted">#{i+1} Best Fit</div>
                   <div style="font-size:16px;font-weight:800;margin-top:4px;">{name}</div>
                   <div style="font-size:28px;font-weight:900;margin-top:6px;">{score:.0f}%</div>
-                  <div class="pv-muted">Fit score</div>
+                  <div class="pv-muted">{"Fit score" if norms is None else f"Fit score · higher than {min(norms.percentile(name, score), 99):.0f}% of respondents"}</div>
                 </div>
                 """,
                 unsafe_allow_html=True,
@@ -228,24 +476,30 @@ def _results_view() -> None:
         unsafe_allow_html=True,
     )
 
+    st.write("")
+    matches = _profile_index(_scoring_model().version).query(result, k=3)
+    rows = "".join(
+        f'<div style="margin-top:6px;"><b>{m.label}</b> <span class="pv-muted">· avg. gap {m.mean_gap:.1f} pts</span></div>'
+        for m in matches
+    )
+    st.markdown(
+        f"""
+        <div class="pv-card">
+          <div style="font-size:15px;font-weight:700;">Closest Role Profiles</div>
+          {rows}
+        </div>
+        """,
+        unsafe_allow_html=True,
+    )
+
     st.write("")
     st.markdown('<div class="pv-card"><div style="font-size:15px;font-weight:700;margin-bottom:10px;">Function Scores</div>', unsafe_allow_html=True)
-    func_df = pd.DataFrame({"Function": list(result.function_scores.keys()), "Score": list(result.function_scores.values())}).sort_values("Score", ascending=True)
-    fig1 = plt.figure()
-    plt.barh(func_df["Function"], func_df["Score"])
-    plt.xlabel("Fit Score (0–100)")
-    plt.tight_layout()
-    st.pyplot(fig1, clear_figure=True)
+    bar_chart(result.function_scores, "Function", "Fit Score (0–100)")
     st.markdown("</div>", unsafe_allow_html=True)
 
     st.write("")
     st.markdown('<div class="pv-card"><div style="font-size:15px;font-weight:700;margin-bottom:10px;">Work-Style Traits</div>', unsafe_allow_html=True)
-    trait_df = pd.DataFrame({"Trait": list(result.trait_scores.keys()), "Score": list(result.trait_scores.values())}).sort_values("Score", ascending=True)
-    fig2 = plt.figure()
-    plt.barh(trait_df["Trait"], trait_df["Score"])
-    plt.xlabel("Strength (0–100)")
-    plt.tight_layout()
-    st.pyplot(fig2, clear_figure=True)
+    bar_chart(result.trait_scores, "Trait", "Strength (0–100)")
     st.markdown("</div>", unsafe_allow_html=True)
 
     st.write("")
@@ -259,27 +513,20 @@ def _results_view() -> None:
         unsafe_allow_html=True,
     )
 
-    export_payload = {
-        "timestamp": datetime.utcnow().isoformat() + "Z",
-        "top_functions": result.top_functions,
-        "recommended_level": result.level,
-        "function_scores": result.function_scores,
-        "trait_scores": result.trait_scores,
-        "answers": st.session_state.answers,
-    }
-
+    bank = _bank()
+    codes = bytes(st.session_state.answers)
+    seconds = {qid: round(s, 2) for qid, s in zip(bank.ids, st.session_state.seconds) if s > 0}
     st.download_button(
         "Download Results (JSON)",
-        data=json.dumps(export_payload, indent=2),
+        data=_lazy_export("json", lambda: results_json(result, decode_answers(codes, bank.ids), seconds=seconds)),
         file_name="hr_career_fit_results.json",
         mime="application/json",
         use_container_width=True,
     )
 
-    ans_df = pd.DataFrame([{"QuestionID": q["id"], "Answer": st.session_state.answers.get(q["id"], "")} for q in QUESTIONS])
     st.download_button(
         "Download Answers (CSV)",
-        data=ans_df.to_csv(index=False),
+        data=_lazy_export("csv", lambda: answers_csv(bank.ids, decode_answers(codes, bank.ids))),
         file_name="hr_career_fit_answers.csv",
         mime="text/csv",
         use_container_width=True,
@@ -290,23 +537,140 @@ def _results_view() -> None:
     with c1:
         st.button("Retake Assessment", use_container_width=True, on_click=_reset)
     with c2:
-        st.button("Back to Review", use_container_width=True, on_click=lambda: st.session_state.update({"idx": max(0, len(QUESTIONS)-1)}))
+        st.button("Back to Review", use_container_width=True, on_click=_back_to_review)
 
-def main() -> None:
-    st.set_page_config(page_title=APP_TITLE, page_icon="🧭", layout="wide")
-    _brand_css()
-    _init_state()
-    _header()
+ANALYTICS_TTL = 15
+ANALYTICS_WINDOWS = {"All time": None, "Last 7 days": 7, "Last 30 days": 30, "Last 90 days": 90}
 
-    if not st.session_state.started:
-        _intro()
-    else:
-        if st.session_state.idx < len(QUESTIONS):
-            _question_view()
-        else:
-            _results_view()
+@st.cache_data(ttl=ANALYTICS_TTL, show_spinner=False)
+def _rollup(by: tuple, cohort: Optional[str], since: Optional[str]) -> list:
+    # Reads the summary cube only, so cost depends on days x cohorts x levels x functions, not respondents.
+    return _result_store().rollup(by, cohort, since)
+
+@perf.traced("analytics_view")
+def _analytics_view() -> None:
+    from store import day_of
 
-    _footer()
+    st.markdown(
+        """
+        <div class="pv-card pv-wrap">
+          <h3 style="margin:0 0 6px 0;">Cohort Analytics</h3>
+          <div class="pv-muted">Function fit and level distributions across past assessments.</div>
+        </div>
+        """,
+        unsafe_allow_html=True,
+    )
+    st.write("")
+
+    c1, c2 = st.columns(2)
+    with c1:
+        cohorts = [row[0] for row in _rollup(("cohort",), None, None)]
+        picked = st.selectbox("Cohort", ["All cohorts"] + [c or "(none)" for c in cohorts])
+        cohort = None if picked == "All cohorts" else ("" if picked == "(none)" else picked)
+    with c2:
+        days = ANALYTICS_WINDOWS[st.selectbox("Period", list(ANALYTICS_WINDOWS))]
+        since = None if days is None else day_of(time.time() - (days - 1) * 86400)
+
+    total = _rollup((), cohort, since)
+    if not total:
+        st.info("No assessments recorded for this selection yet.")
+        return
+    n, mean_seniority = total[0]
+    by_function = {f: c for f, c, _ in _rollup(("top_function",), cohort, since)}
+    by_level = {lv: c for lv, c, _ in _rollup(("level",), cohort, since)}
+
+    cols = st.columns(3)
+    for col, (label, value) in zip(cols, (
+        ("Assessments", f"{n:,}"),
+        ("Mean seniority", f"{mean_seniority:.0f}"),
+        ("Most common track", max(by_function, key=by_function.get)),
+    )):
+        with col:
+            st.markdown(
+                f"""
+                <div class="pv-kpi">
+                  <div class="pv-muted">{label}</div>
+                  <div style="font-size:22px;font-weight:900;margin-top:6px;">{value}</div>
+                </div>
+                """,
+                unsafe_allow_html=True,
+            )
+
+    st.write("")
+    st.markdown('<div class="pv-card"><div style="font-size:15px;font-weight:700;margin-bottom:10px;">Top Function</div>', unsafe_allow_html=True)
+    bar_chart(by_function, "Function", "Respondents")
+    st.markdown("</div>", unsafe_allow_html=True)
+
+    st.write("")
+    st.markdown('<div class="pv-card"><div style="font-size:15px;font-weight:700;margin-bottom:10px;">Recommended Level</div>', unsafe_allow_html=True)
+    bar_chart({lv: by_level.get(lv, 0) for lv in LEVEL_LABELS}, "Level", "Respondents")
+    st.markdown("</div>", unsafe_allow_html=True)
+
+    st.write("")
+    trend = _rollup(("day",), cohort, since)
+    st.line_chart({"Day": [d for d, _, _ in trend], "Assessments": [c for _, c, _ in trend]}, x="Day", y="Assessments")
+
+    cross: Dict[str, Dict[str, int]] = {}
+    for f, lv, c, _ in _rollup(("top_function", "level"), cohort, since):
+        cross.setdefault(f, {})[lv] = c
+    st.dataframe(
+        [{"Top function": f, **{lv: cross[f].get(lv, 0) for lv in LEVEL_LABELS}} for f in sorted(cross)],
+        hide_index=True,
+        use_container_width=True,
+    )
+
+def _perf_overlay() -> None:
+    # Developer overlay: HRFIT_PERF=1 and ?perf=1 in the URL.
+    if not perf.ENABLED or st.query_params.get("perf") != "1":
+        return
+    with st.expander("Performance (this rerun)", expanded=True):
+        since_start = st.session_state.get("assessment_reruns")
+        if since_start is None and st.session_state.started:
+            since_start = st.session_state.reruns - st.session_state.get("reruns_at_start", 0)
+        st.markdown(
+            f"Reruns this session: **{st.session_state.reruns}**"
+            f" (fragment-only: {st.session_state.get('fragment_reruns', 0)})"
+            + (f" · this assessment: **{since_start}**" if since_start is not None else "")
+        )
+        rows = [{"Stage": stage, "ms": round(seconds * 1000, 2)} for stage, seconds in perf.rerun_breakdown()]
+        st.table(rows)
+        totals = perf.REGISTRY.snapshot()
+        st.table([
+            {"Stage": stage, "Count": s["count"], "Mean ms": round(s["mean_ms"], 2), "p95 ≤ ms": s["p95_le_ms"]}
+            for stage, s in totals.items()
+        ])
+
+def main() -> None:
+    perf.begin_rerun()
+    perf.start_exporters_from_env()
+    with perf.timed("main"):
+        st.set_page_config(page_title=APP_TITLE, page_icon="🧭", layout="wide")
+        _brand_css()
+        _init_state()
+        st.session_state.reruns = st.session_state.get("reruns", 0) + 1
+        _header()
+
+        # Full-script runs and fragment reruns of _question_view both count as reruns.
+        st.session_state.full_run = True
+        try:
+            if STORE_PATH and st.query_params.get("view") == "analytics":
+                _analytics_view()
+            elif not st.session_state.started:
+                _intro()
+            else:
+                if st.session_state.idx >= len(st.session_state.order):
+                    # Reruns from Start up to and including the first results render.
+                    st.session_state.setdefault("assessment_reruns", st.session_state.reruns - st.session_state.get("reruns_at_start", 0))
+                    _results_view()
+                elif st.session_state.paged:
+                    _page_view()
+                else:
+                    _question_view()
+        finally:
+            st.session_state.full_run = False
+
+        _footer()
+    _perf_overlay()
 
 if __name__ == "__main__":
     main()
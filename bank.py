@@ -0,0 +1,120 @@
+# bank.py
+# Validated, immutable question bank: integer-indexed dimensions, __slots__ question records and
+# array-backed weights. Built once from questions.QUESTIONS at import, so a typo in a weight key
+# fails at startup instead of being skipped on every scoring call.
+from __future__ import annotations
+
+import math
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+import numpy as np
+
+from questions import FUNCTIONS, TRAITS, LEVEL_DIMS, QUESTIONS
+
+WEIGHT_KEYS = (("func_w", FUNCTIONS), ("trait_w", TRAITS), ("level_w", LEVEL_DIMS))
+
+class QuestionBankError(ValueError):
+    def __init__(self, problems: List[str]):
+        super().__init__("invalid question bank:\n  " + "\n  ".join(problems))
+        self.problems = problems
+
+class Question:
+    __slots__ = ("index", "id", "text")
+
+    def __init__(self, index: int, id: str, text: str):
+        self.index = index
+        self.id = id
+        self.text = text
+
+    def __repr__(self) -> str:
+        return f"Question({self.index}, {self.id!r})"
+
+class QuestionBank:
+    """Questions plus (questions x dimensions) weight matrices; columns follow the dimension lists."""
+
+    __slots__ = ("questions", "ids", "functions", "traits", "level_dims", "func_w", "trait_w", "level_w", "_index")
+
+    def __init__(
+        self,
+        questions: Tuple[Question, ...],
+        functions: Tuple[str, ...],
+        traits: Tuple[str, ...],
+        level_dims: Tuple[str, ...],
+        func_w: np.ndarray,
+        trait_w: np.ndarray,
+        level_w: np.ndarray,
+    ):
+        self.questions = questions
+        self.ids = tuple(q.id for q in questions)
+        self.functions = functions
+        self.traits = traits
+        self.level_dims = level_dims
+        for w in (func_w, trait_w, level_w):
+            w.setflags(write=False)
+        self.func_w = func_w
+        self.trait_w = trait_w
+        self.level_w = level_w
+        self._index = {qid: i for i, qid in enumerate(self.ids)}
+
+    @classmethod
+    def from_dicts(
+        cls,
+        questions: Sequence[dict],
+        functions: Sequence[str] = FUNCTIONS,
+        traits: Sequence[str] = TRAITS,
+        level_dims: Sequence[str] = LEVEL_DIMS,
+    ) -> "QuestionBank":
+        dims = dict(zip(("func_w", "trait_w", "level_w"), (functions, traits, level_dims)))
+        cols = {key: {name: j for j, name in enumerate(names)} for key, names in dims.items()}
+        mats = {key: np.zeros((len(questions), len(names)), dtype=np.float64) for key, names in dims.items()}
+
+        problems: List[str] = []
+        records: List[Question] = []
+        seen: Dict[str, int] = {}
+        for i, q in enumerate(questions):
+            qid = q.get("id")
+            where = f"question #{i + 1} ({qid!r})"
+            if not isinstance(qid, str) or not qid:
+                problems.append(f"{where}: missing id")
+            elif qid in seen:
+                problems.append(f"{where}: duplicate id (first used by question #{seen[qid] + 1})")
+            else:
+                seen[qid] = i
+            text = q.get("text")
+            if not isinstance(text, str) or not text.strip():
+                problems.append(f"{where}: missing text")
+            for key, col in cols.items():
+                for name, weight in q.get(key, {}).items():
+                    if name not in col:
+                        problems.append(f"{where}: unknown {key} dimension {name!r}")
+                    elif not isinstance(weight, (int, float)) or isinstance(weight, bool) or not math.isfinite(weight):
+                        problems.append(f"{where}: {key}[{name!r}] is not a finite number")
+                    else:
+                        mats[key][i, col[name]] = float(weight)
+            records.append(Question(i, qid if isinstance(qid, str) else "", text if isinstance(text, str) else ""))
+        if problems:
+            raise QuestionBankError(problems)
+
+        return cls(
+            tuple(records),
+            tuple(functions),
+            tuple(traits),
+            tuple(level_dims),
+            mats["func_w"],
+            mats["trait_w"],
+            mats["level_w"],
+        )
+
+    def __len__(self) -> int:
+        return len(self.questions)
+
+    def __getitem__(self, i: int) -> Question:
+        return self.questions[i]
+
+    def __iter__(self) -> Iterator[Question]:
+        return iter(self.questions)
+
+    def index_of(self, qid: str) -> int:
+        return self._index[qid]
+
+BANK = QuestionBank.from_dicts(QUESTIONS)
@@ -0,0 +1,163 @@
+# bank_store.py
+# External question banks: a JSON source file plus a compiled binary sidecar (<source>.bin) whose
+# weight matrices and text blob are memory-mapped, so worker processes share one copy of a large
+# bank instead of each re-parsing it. BankLoader hot-reloads when the source file changes.
+#
+#   python bank_store.py export banks/default.json     # write the built-in bank as a source file
+#   python bank_store.py compile banks/default.json    # (re)build banks/default.json.bin
+#
+# Source file: {"functions": [...], "traits": [...], "level_dims": [...],
+#               "questions": [{"id", "text", "func_w", "trait_w", "level_w"}, ...]}
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import struct
+import threading
+import time
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from bank import Question, QuestionBank
+from questions import FUNCTIONS, TRAITS, LEVEL_DIMS, QUESTIONS
+
+MAGIC = b"HRFB"
+FORMAT_VERSION = 1
+# magic, format version, questions, functions, traits, level dims, source mtime_ns, source size
+_HEADER = struct.Struct("<4sIIIIIqq")
+_HEADER_SIZE = 64
+
+def sidecar_path(source: str) -> str:
+    return source + ".bin"
+
+def read_source(source: str) -> QuestionBank:
+    with open(source, "r", encoding="utf-8") as f:
+        doc = json.load(f)
+    return QuestionBank.from_dicts(
+        doc["questions"],
+        doc.get("functions", FUNCTIONS),
+        doc.get("traits", TRAITS),
+        doc.get("level_dims", LEVEL_DIMS),
+    )
+
+def write_source(path: str, questions: Sequence[dict] = QUESTIONS) -> None:
+    doc = {"functions": FUNCTIONS, "traits": TRAITS, "level_dims": LEVEL_DIMS, "questions": list(questions)}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(doc, f, ensure_ascii=False, indent=1)
+
+def _pad8(n: int) -> int:
+    return (n + 7) & ~7
+
+def compile_sidecar(source: str) -> str:
+    """Validate the source bank and write its binary sidecar atomically; returns the sidecar path."""
+    bank = read_source(source)
+    st = os.stat(source)
+    strings = list(bank.functions) + list(bank.traits) + list(bank.level_dims)
+    strings += [q.id for q in bank] + [q.text for q in bank]
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype="<u8")
+    offsets[1:] = np.cumsum([len(b) for b in encoded])
+
+    header = _HEADER.pack(
+        MAGIC, FORMAT_VERSION, len(bank), len(bank.functions), len(bank.traits), len(bank.level_dims),
+        st.st_mtime_ns, st.st_size,
+    ).ljust(_HEADER_SIZE, b"\0")
+
+    out = sidecar_path(source)
+    tmp = f"{out}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(header)
+        for w in (bank.func_w, bank.trait_w, bank.level_w):
+            f.write(np.ascontiguousarray(w, dtype="<f8").tobytes())
+        f.write(offsets.tobytes())
+        blob = b"".join(encoded)
+        f.write(blob + b"\0" * (_pad8(len(blob)) - len(blob)))
+    os.replace(tmp, out)
+    return out
+
+def _sidecar_is_fresh(source: str, sidecar: str) -> bool:
+    if not os.path.exists(sidecar):
+        return False
+    with open(sidecar, "rb") as f:
+        raw = f.read(_HEADER.size)
+    if len(raw) < _HEADER.size:
+        return False
+    magic, version, *_, mtime_ns, size = _HEADER.unpack(raw)
+    st = os.stat(source)
+    return magic == MAGIC and version == FORMAT_VERSION and mtime_ns == st.st_mtime_ns and size == st.st_size
+
+def load_sidecar(sidecar: str) -> QuestionBank:
+    buf = np.memmap(sidecar, dtype=np.uint8, mode="r")
+    magic, version, n, nf, nt, nl, _, _ = _HEADER.unpack(bytes(buf[: _HEADER.size]))
+    if magic != MAGIC or version != FORMAT_VERSION:
+        raise ValueError(f"{sidecar}: not a question bank sidecar (format {FORMAT_VERSION})")
+
+    pos = _HEADER_SIZE
+    mats = []
+    for cols in (nf, nt, nl):
+        size = n * cols * 8
+        mats.append(buf[pos : pos + size].view("<f8").reshape(n, cols))
+        pos += size
+    n_strings = nf + nt + nl + 2 * n
+    offsets = buf[pos : pos + (n_strings + 1) * 8].view("<u8")
+    pos += (n_strings + 1) * 8
+    raw = bytes(buf[pos : pos + int(offsets[-1])])
+    bounds = offsets.tolist()
+    texts = [raw[bounds[i] : bounds[i + 1]].decode("utf-8") for i in range(n_strings)]
+
+    functions, traits, level_dims = texts[:nf], texts[nf : nf + nt], texts[nf + nt : nf + nt + nl]
+    ids, bodies = texts[nf + nt + nl : nf + nt + nl + n], texts[nf + nt + nl + n :]
+    questions = tuple(Question(i, ids[i], bodies[i]) for i in range(n))
+    return QuestionBank(questions, tuple(functions), tuple(traits), tuple(level_dims), *mats)
+
+def load_bank(source: str) -> QuestionBank:
+    """Load a bank through its sidecar, compiling the sidecar first if it is missing or stale."""
+    sidecar = sidecar_path(source)
+    if not _sidecar_is_fresh(source, sidecar):
+        compile_sidecar(source)
+    return load_sidecar(sidecar)
+
+class BankLoader:
+    """Holds the current bank for a source file and reloads it when the file changes."""
+
+    def __init__(self, source: str, check_interval: float = 2.0):
+        self.source = source
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._stamp: Optional[Tuple[int, int]] = None
+        self._checked = 0.0
+        self._bank: Optional[QuestionBank] = None
+
+    def _file_stamp(self) -> Tuple[int, int]:
+        st = os.stat(self.source)
+        return st.st_mtime_ns, st.st_size
+
+    def get(self) -> QuestionBank:
+        now = time.monotonic()
+        if self._bank is not None and now - self._checked < self.check_interval:
+            return self._bank
+        with self._lock:
+            self._checked = now
+            stamp = self._file_stamp()
+            if self._bank is None or stamp != self._stamp:
+                self._bank = load_bank(self.source)
+                self._stamp = stamp
+            return self._bank
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Export or compile external question banks.")
+    parser.add_argument("command", choices=("export", "compile"))
+    parser.add_argument("path", help="bank source file (JSON)")
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        write_source(args.path)
+        print(f"wrote {args.path} ({len(QUESTIONS)} questions)")
+    else:
+        out = compile_sidecar(args.path)
+        print(f"wrote {out} ({os.path.getsize(out):,} bytes)")
+
+if __name__ == "__main__":
+    main()
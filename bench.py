@@ -0,0 +1,190 @@
+# bench.py
+# Benchmark suite for scoring, chart rendering, exports and question-bank loading.
+# Reports best-of wall time and tracemalloc peak memory per case and size, and can save a
+# baseline and flag regressions against it.
+#
+#   python bench.py                                  # sizes 1, 1k, 100k, 1M
+#   python bench.py --sizes 1,1000 --save bench_baseline.json
+#   python bench.py --compare bench_baseline.json --threshold 0.25
+from __future__ import annotations
+
+import argparse
+import importlib
+import json
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+import questions
+from questions import LIKERT, QUESTIONS, FUNCTIONS
+from scoring import _normalize, compile_model, compute_scores, score_batch
+
+SIZES = (1, 1000, 100_000, 1_000_000)
+
+@dataclass
+class BenchResult:
+    case: str
+    size: int
+    seconds: float
+    peak_mb: float
+
+    @property
+    def key(self) -> str:
+        return f"{self.case}@{self.size}"
+
+def synthetic_codes(n: int, seed: int = 0, missing: float = 0.02) -> np.ndarray:
+    """n x len(QUESTIONS) Likert codes (1-5), with a small share left unanswered (0)."""
+    rng = np.random.default_rng(seed)
+    codes = rng.integers(1, 6, size=(n, len(QUESTIONS)), dtype=np.uint8)
+    codes[rng.random(codes.shape) < missing] = 0
+    return codes
+
+def synthetic_answers(n: int, seed: int = 0) -> List[Dict[str, str]]:
+    qids = [q["id"] for q in QUESTIONS]
+    return [
+        {qid: LIKERT[c - 1] for qid, c in zip(qids, row) if c}
+        for row in synthetic_codes(n, seed).tolist()
+    ]
+
+def _loop(fn: Callable, items: list) -> Callable[[], None]:
+    def run() -> None:
+        for item in items:
+            fn(item)
+    return run
+
+def _case_compute_scores(n: int) -> Callable[[], None]:
+    return _loop(lambda a: compute_scores(QUESTIONS, a), synthetic_answers(n))
+
+def _case_score_batch(n: int) -> Callable[[], None]:
+    codes = synthetic_codes(n)
+    return lambda: score_batch(QUESTIONS, codes)
+
+def _case_normalize(n: int) -> Callable[[], None]:
+    rng = np.random.default_rng(1)
+    max_possible = {f: 100.0 for f in FUNCTIONS}
+    raws = [dict(zip(FUNCTIONS, row)) for row in (rng.random((n, len(FUNCTIONS))) * 100).tolist()]
+    return _loop(lambda raw: _normalize(raw, max_possible), raws)
+
+def _case_charts(n: int) -> Callable[[], None]:
+    from charts import _sorted_scores, render_bar_png
+
+    results = [compute_scores(QUESTIONS, a) for a in synthetic_answers(n)]
+
+    def render(result) -> None:
+        render_bar_png(*_sorted_scores(result.function_scores), "Fit Score (0–100)")
+        render_bar_png(*_sorted_scores(result.trait_scores), "Strength (0–100)")
+    return _loop(render, results)
+
+def _case_export_json(n: int) -> Callable[[], None]:
+    from exports import results_json
+
+    answers = synthetic_answers(n)
+    pairs = [(compute_scores(QUESTIONS, a), a) for a in answers]
+    return _loop(lambda p: results_json(p[0], p[1]), pairs)
+
+def _case_export_csv(n: int) -> Callable[[], None]:
+    from exports import answers_csv
+
+    qids = [q["id"] for q in QUESTIONS]
+    return _loop(lambda a: answers_csv(qids, a), synthetic_answers(n))
+
+def _case_bank_load(n: int) -> Callable[[], None]:
+    def run() -> None:
+        for _ in range(n):
+            compile_model(importlib.reload(questions).QUESTIONS)
+    return run
+
+# (name, setup, largest size worth running); per-respondent Python loops are capped so a
+# full run stays in minutes, while the vectorized path goes all the way to 1M.
+CASES: List[Tuple[str, Callable[[int], Callable[[], None]], int]] = [
+    ("compute_scores", _case_compute_scores, 100_000),
+    ("score_batch", _case_score_batch, 1_000_000),
+    ("normalize", _case_normalize, 100_000),
+    ("charts", _case_charts, 1),
+    ("export_json", _case_export_json, 1000),
+    ("export_csv", _case_export_csv, 1000),
+    ("bank_load", _case_bank_load, 1),
+]
+
+def measure(run: Callable[[], None], repeat: int) -> Tuple[float, float]:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - t0)
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return best, peak / 1e6
+
+def run_suite(sizes=SIZES, cases: Optional[List[str]] = None, repeat: int = 3, progress=sys.stderr) -> List[BenchResult]:
+    results: List[BenchResult] = []
+    for name, setup, limit in CASES:
+        if cases and name not in cases:
+            continue
+        for n in sizes:
+            if n > limit:
+                continue
+            run = setup(n)
+            seconds, peak_mb = measure(run, repeat if n <= 1000 else 1)
+            results.append(BenchResult(name, n, seconds, peak_mb))
+            if progress is not None:
+                print(f"  {name}@{n}: {seconds*1000:.2f} ms", file=progress)
+    return results
+
+def compare(results: List[BenchResult], baseline: Dict[str, dict], threshold: float) -> List[str]:
+    regressions = []
+    for r in results:
+        base = baseline.get(r.key)
+        if base and base["seconds"] > 0 and r.seconds > base["seconds"] * (1 + threshold):
+            regressions.append(f"{r.key}: {base['seconds']*1000:.2f} ms -> {r.seconds*1000:.2f} ms")
+    return regressions
+
+def _print_table(results: List[BenchResult], baseline: Dict[str, dict]) -> None:
+    print(f"{'case':<16}{'size':>10}{'time (ms)':>14}{'per item (us)':>16}{'peak MB':>10}{'vs base':>10}")
+    for r in results:
+        base = baseline.get(r.key)
+        ratio = f"{r.seconds / base['seconds']:.2f}x" if base and base["seconds"] > 0 else ""
+        print(f"{r.case:<16}{r.size:>10}{r.seconds*1000:>14.2f}{r.seconds/r.size*1e6:>16.2f}{r.peak_mb:>10.1f}{ratio:>10}")
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark HR Career Fit scoring, charts and exports.")
+    parser.add_argument("--sizes", default=",".join(str(s) for s in SIZES), help="comma-separated respondent counts")
+    parser.add_argument("--cases", help="comma-separated subset of: " + ", ".join(c[0] for c in CASES))
+    parser.add_argument("--repeat", type=int, default=3, help="timing repeats for sizes up to 1000 (best is kept)")
+    parser.add_argument("--save", help="write results to this baseline JSON file")
+    parser.add_argument("--compare", help="baseline JSON file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown vs baseline before failing")
+    args = parser.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    cases = args.cases.split(",") if args.cases else None
+    results = run_suite(sizes, cases, args.repeat)
+
+    baseline: Dict[str, dict] = {}
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    _print_table(results, baseline)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({r.key: asdict(r) for r in results}, f, indent=2)
+
+    if args.compare:
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print("\nregressions (>{:.0%} slower):".format(args.threshold))
+            for line in regressions:
+                print("  " + line)
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
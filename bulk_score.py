@@ -0,0 +1,449 @@
+# bulk_score.py
+# Headless bulk scorer: streams answer exports in fixed-size chunks and writes scores incrementally.
+#
+#   python bulk_score.py answers.csv scores.csv --chunk-size 20000 --checkpoint scores.ckpt --workers 8
+#   python bulk_score.py answers.csv scores.csv --export results.jsonl.gz   # also .jsonl, .jsonl.zst, .parquet
+#
+# Input formats:
+#   long  - QuestionID,Answer rows as written by "Download Answers (CSV)". Several exports may be
+#           concatenated (a repeated header or QuestionID starts the next respondent), or a
+#           RespondentID column may group the rows.
+#   wide  - one respondent per row, one column per question ID, optional RespondentID column.
+#   jsonl - one "Download Results (JSON)" payload per line; answers are read from "answers" (and
+#           per-question times for --quality from the optional "seconds").
+#   json  - one JSON document: a single "Download Results (JSON)" payload, a list of them, or
+#           {"results": [...]} (the shapes server.py accepts). Checkpoint offsets count records.
+#
+# Any input may be gzip (.gz) or zstd (.zst, needs the optional 'zstandard' package) compressed, so
+# a --export file can be scored again as is. Offsets then count decompressed bytes, and resuming
+# from a checkpoint decompresses up to the offset again.
+from __future__ import annotations
+
+import argparse
+import csv
+import gzip
+import io
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from bank import BANK
+from exports import ExportWriter, _zstd, encode_jsonl, export_kind, json_records, payload_codes
+from questions import FUNCTIONS, TRAITS, LEVEL_DIMS
+from quality import check_batch
+from scoring import BatchScores, get_model, label_code, score_batch
+from store import ResultStore
+
+FORMATS = ("long", "wide", "jsonl", "json")
+DEFAULT_CHUNK_SIZE = 10000
+
+OUTPUT_COLUMNS = (
+    ["RespondentID", "Level", "Seniority", "Top1", "Top2", "Top3"]
+    + FUNCTIONS
+    + TRAITS
+    + LEVEL_DIMS
+)
+QUALITY_COLUMNS = ["QualityFlags"]
+
+@dataclass
+class Chunk:
+    first_row: int
+    end_offset: int
+    payload: List[Any]
+
+@dataclass
+class RunStats:
+    rows: int
+    seconds: float
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.rows / self.seconds if self.seconds > 0 else 0.0
+
+def _csv_row(line: bytes) -> List[str]:
+    return next(csv.reader([line.decode("utf-8-sig").rstrip("\r\n")]))
+
+COMPRESSED_SUFFIXES = (".gz", ".zst")
+
+class _ZstdInput(io.RawIOBase):
+    """Decompressed view of a (multi-frame) zstd file; seeking backwards starts over, like gzip.GzipFile."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._open()
+
+    def _open(self) -> None:
+        self._stream = _zstd().ZstdDecompressor().stream_reader(open(self.path, "rb"), read_across_frames=True)
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        n = self._stream.readinto(b)
+        self._pos += n
+        return n
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence != io.SEEK_SET:
+            raise io.UnsupportedOperation("zstd inputs can only seek to absolute offsets")
+        if offset < self._pos:
+            self._stream.close()
+            self._open()
+        while self._pos < offset:
+            data = self._stream.read(min(offset - self._pos, 1 << 20))
+            if not data:
+                break
+            self._pos += len(data)
+        return self._pos
+
+    def close(self) -> None:
+        if not self.closed:
+            self._stream.close()
+        super().close()
+
+def open_input(path: str):
+    """Binary reader over the decompressed contents of an input file."""
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")
+    if path.endswith(".zst"):
+        return io.BufferedReader(_ZstdInput(path))
+    return open(path, "rb")
+
+def detect_format(path: str, header: bytes) -> str:
+    for suffix in COMPRESSED_SUFFIXES:
+        if path.endswith(suffix):
+            path = path[: -len(suffix)]
+    if path.endswith((".jsonl", ".ndjson")):
+        return "jsonl"
+    if path.endswith(".json"):
+        return "json"
+    return "long" if "QuestionID" in _csv_row(header) else "wide"
+
+def _iter_lines(f, offset: int) -> Iterator[Tuple[int, bytes]]:
+    f.seek(offset)
+    while True:
+        pos = f.tell()
+        line = f.readline()
+        if not line:
+            return
+        if line.strip():
+            yield pos, line
+
+def _iter_long_groups(
+    lines: Iterable[Tuple[int, bytes]], header: bytes
+) -> Iterator[Tuple[int, Optional[str], List[Tuple[str, str]]]]:
+    cols = _csv_row(header)
+    qid_idx, ans_idx = cols.index("QuestionID"), cols.index("Answer")
+    rid_idx = cols.index("RespondentID") if "RespondentID" in cols else None
+
+    start, rid, rows, seen = 0, None, [], set()
+    new_group = True
+    for pos, line in lines:
+        if line.rstrip(b"\r\n") == header.rstrip(b"\r\n"):
+            new_group = True
+            continue
+        row = _csv_row(line)
+        key = row[rid_idx] if rid_idx is not None else None
+        qid = row[qid_idx]
+        if rows and (new_group or (rid_idx is not None and key != rid) or (rid_idx is None and qid in seen)):
+            yield start, rid, rows
+            rows, seen = [], set()
+        if not rows:
+            start, rid = pos, key
+        new_group = False
+        rows.append((qid, row[ans_idx] if ans_idx < len(row) else ""))
+        seen.add(qid)
+    if rows:
+        yield start, rid, rows
+
+def iter_chunks(f, fmt: str, header: bytes, offset: int, first_row: int, chunk_size: int) -> Iterator[Chunk]:
+    """Yield record-aligned chunks; end_offset is where the next chunk's first record starts
+    (a byte offset, or a record index for the json format)."""
+    if fmt == "json":
+        f.seek(0)
+        docs = json_records(json.loads(f.read().decode("utf-8-sig")))
+        records: Iterator[Tuple[int, Any]] = ((i, docs[i]) for i in range(offset, len(docs)))
+    elif fmt == "long":
+        records = ((pos, (rid, rows)) for pos, rid, rows in _iter_long_groups(_iter_lines(f, offset), header))
+    else:
+        records = _iter_lines(f, offset)
+    batch: List[Any] = []
+    row = first_row
+    for pos, record in records:
+        if len(batch) >= chunk_size:
+            yield Chunk(row, pos, batch)
+            row += len(batch)
+            batch = []
+        batch.append(record)
+    if batch:
+        if fmt == "json":
+            yield Chunk(row, len(docs), batch)
+            return
+        # The records ran to the end of the input, so this is its (decompressed) size.
+        yield Chunk(row, f.tell(), batch)
+
+def parse_chunk(fmt: str, header: bytes, chunk: Chunk) -> Tuple[np.ndarray, np.ndarray, Optional[np.ndarray]]:
+    """Respondent ids, answer codes and, for the JSON formats, seconds spent per question."""
+    qids = BANK.ids
+    col = {qid: j for j, qid in enumerate(qids)}
+    n = len(chunk.payload)
+    ids = np.arange(chunk.first_row, chunk.first_row + n).astype(str).astype(object)
+    codes = np.zeros((n, len(qids)), dtype=np.uint8)
+    seconds = None
+
+    if fmt == "wide":
+        names = _csv_row(header)
+        rid_idx = names.index("RespondentID") if "RespondentID" in names else None
+        picks = [k for k, name in enumerate(names) if name in col]
+        cols = [col[names[k]] for k in picks]
+        width = max(picks) + 1 if picks else 0
+        rows = []
+        for i, row in enumerate(csv.reader(line.decode("utf-8").rstrip("\r\n") for line in chunk.payload)):
+            if rid_idx is not None and rid_idx < len(row):
+                ids[i] = row[rid_idx]
+            if len(row) < width:
+                row += [""] * (width - len(row))
+            rows.append([label_code(row[k]) for k in picks])
+        if rows:
+            codes[:, cols] = np.array(rows, dtype=np.uint8)
+    elif fmt == "long":
+        for i, (rid, rows) in enumerate(chunk.payload):
+            if rid is not None:
+                ids[i] = rid
+            for qid, answer in rows:
+                if qid in col:
+                    codes[i, col[qid]] = label_code(answer)
+    else:
+        records = [json.loads(line) for line in chunk.payload] if fmt == "jsonl" else chunk.payload
+        rids, codes, seconds = payload_codes(records, qids)
+        for i, rid in enumerate(rids):
+            if rid is not None:
+                ids[i] = rid
+    return ids, codes, seconds
+
+def iter_code_blocks(path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[np.ndarray]:
+    """Answer codes of an input file (any FORMATS layout) as (rows x questions) uint8 blocks."""
+    with open_input(path) as f:
+        header = f.readline()
+        fmt = detect_format(path, header)
+        if fmt in ("jsonl", "json"):
+            header, start = b"", 0
+        else:
+            start = f.tell()
+        for chunk in iter_chunks(f, fmt, header, start, 0, chunk_size):
+            yield parse_chunk(fmt, header, chunk)[1]
+
+def format_rows(scores: BatchScores, quality: Optional[List[str]] = None) -> str:
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator="\n")
+    dims = np.round(np.hstack([scores.function_scores, scores.trait_scores, scores.level_scores]), 2)
+    top = scores.top_functions
+    rows = (
+        [rid, level, round(sen, 2), *names, *vals]
+        for rid, level, sen, names, vals in zip(
+            scores.respondent_ids.tolist(),
+            scores.levels.tolist(),
+            scores.seniority.tolist(),
+            top.tolist(),
+            dims.tolist(),
+        )
+    )
+    if quality is not None:
+        rows = (row + [flags] for row, flags in zip(rows, quality))
+    writer.writerows(rows)
+    return buf.getvalue()
+
+ScoredChunk = Tuple[str, Optional[BatchScores], Optional[np.ndarray], Optional[bytes]]
+
+def score_chunk(
+    fmt: str, header: bytes, chunk: Chunk, keep_scores: bool = False, export: Optional[str] = None, quality: bool = False
+) -> ScoredChunk:
+    """Output CSV text for a chunk, plus its scores and answer codes when keep_scores is set and
+    its encoded JSONL export block when `export` is a JSONL export kind. With `quality`, the CSV
+    rows end with the respondent's quality flags (see quality.py)."""
+    ids, codes, seconds = parse_chunk(fmt, header, chunk)
+    scores = score_batch(BANK, codes, respondent_ids=ids)
+    encoded = encode_jsonl(scores, codes, BANK.ids, export) if export in ("jsonl", "gzip", "zstd") else None
+    flags = check_batch(get_model(BANK), codes, seconds).labels() if quality else None
+    if keep_scores:
+        return format_rows(scores, flags), scores, codes, encoded
+    return format_rows(scores, flags), None, None, encoded
+
+def _scored_chunks(
+    chunks: Iterable[Chunk],
+    fmt: str,
+    header: bytes,
+    workers: int,
+    keep_scores: bool = False,
+    export: Optional[str] = None,
+    quality: bool = False,
+) -> Iterator[Tuple[Chunk, ScoredChunk]]:
+    """Score chunks in input order, fanning out to a process pool when workers > 1."""
+    if workers <= 1:
+        for chunk in chunks:
+            yield chunk, score_chunk(fmt, header, chunk, keep_scores, export, quality)
+        return
+    # At most two chunks per worker are in flight, which bounds memory and keeps every worker busy.
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending: deque = deque()
+        for chunk in chunks:
+            pending.append((chunk, pool.submit(score_chunk, fmt, header, chunk, keep_scores, export, quality)))
+            if len(pending) >= 2 * workers:
+                done_chunk, future = pending.popleft()
+                yield done_chunk, future.result()
+        while pending:
+            done_chunk, future = pending.popleft()
+            yield done_chunk, future.result()
+
+def read_checkpoint(path: Optional[str]) -> Dict[str, Any]:
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def write_checkpoint(path: str, state: Dict[str, Any]) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+
+def run(
+    input_path: str,
+    output_path: str,
+    fmt: str = "auto",
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    checkpoint: Optional[str] = None,
+    progress=sys.stderr,
+    workers: int = 1,
+    store: Optional[ResultStore] = None,
+    cohort: str = "",
+    export: Optional[str] = None,
+    quality: bool = False,
+) -> RunStats:
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    kind = export_kind(export) if export else None
+    if kind == "parquet" and checkpoint:
+        raise ValueError("Parquet exports cannot be resumed; use a .jsonl[.gz|.zst] export with --checkpoint")
+    state = read_checkpoint(checkpoint)
+    with open_input(input_path) as src:
+        header = src.readline()
+        if fmt == "auto":
+            fmt = detect_format(input_path, header)
+        if fmt not in FORMATS:
+            raise ValueError(f"unknown format {fmt!r}; expected one of {', '.join(FORMATS)}")
+        if fmt in ("jsonl", "json"):
+            header, start = b"", 0
+        else:
+            start = src.tell()
+        offset = state.get("offset", start)
+        rows = state.get("rows", 0)
+
+        source = os.path.abspath(input_path)
+        if state and state.get("input") != source:
+            raise ValueError(f"checkpoint {checkpoint} belongs to {state.get('input')}, not {source}")
+        if state and state.get("quality", False) != quality:
+            raise ValueError(f"checkpoint {checkpoint} was written {'with' if state.get('quality') else 'without'} --quality")
+        resuming = bool(state) and os.path.exists(output_path)
+        writer = ExportWriter(export, BANK.ids, state.get("export_size", 0) if resuming else None) if export else None
+        with open(output_path, "r+b" if resuming else "wb") as out:
+            if resuming:
+                # Drop anything written after the last checkpoint before appending again.
+                out.truncate(state["output_size"])
+                out.seek(state["output_size"])
+            else:
+                columns = OUTPUT_COLUMNS + QUALITY_COLUMNS if quality else OUTPUT_COLUMNS
+                out.write((",".join(columns) + "\n").encode("utf-8"))
+                rows = 0
+                offset = start
+
+            t0 = time.perf_counter()
+            done = 0
+            chunks = iter_chunks(src, fmt, header, offset, rows, chunk_size)
+            keep_scores = store is not None or kind == "parquet"
+            for chunk, (text, scores, codes, encoded) in _scored_chunks(chunks, fmt, header, workers, keep_scores, kind, quality):
+                out.write(text.encode("utf-8"))
+                if store is not None:
+                    store.record_batch(scores, codes, cohort=cohort, bank_version=get_model(BANK).version)
+                if writer is not None:
+                    writer.write(scores, codes, encoded)
+                out.flush()
+                done += len(chunk.payload)
+                rows = chunk.first_row + len(chunk.payload)
+                if checkpoint:
+                    if store is not None:
+                        # The checkpoint must never get ahead of what the store has committed;
+                        # flush() raises if a commit failed, so no checkpoint is written past it.
+                        store.flush()
+                    write_checkpoint(
+                        checkpoint,
+                        {
+                            "input": source,
+                            "offset": chunk.end_offset,
+                            "rows": rows,
+                            "output_size": out.tell(),
+                            "export_size": writer.tell() if writer is not None else 0,
+                            "quality": quality,
+                        },
+                    )
+                if progress is not None:
+                    elapsed = time.perf_counter() - t0
+                    print(f"{rows} rows scored ({done / elapsed if elapsed else 0:,.0f} rows/sec)", file=progress)
+            if writer is not None:
+                writer.close()
+
+    stats = RunStats(rows=done, seconds=time.perf_counter() - t0)
+    if progress is not None:
+        print(f"done: {stats.rows} rows in {stats.seconds:.2f}s ({stats.rows_per_sec:,.0f} rows/sec)", file=progress)
+    return stats
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Score HR Career Fit answer exports in bulk.")
+    parser.add_argument("input", help="answers file (long CSV, wide CSV, JSONL or JSON; optionally .gz/.zst)")
+    parser.add_argument("output", help="scores CSV to write")
+    parser.add_argument("--format", default="auto", choices=("auto",) + FORMATS)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="respondents per chunk")
+    parser.add_argument("--checkpoint", help="checkpoint file; resumes from its offset when present")
+    parser.add_argument("--workers", type=int, default=1, help="scoring processes (0 = one per CPU core)")
+    parser.add_argument("--store", help="also record results in this SQLite result store (see store.py)")
+    parser.add_argument("--cohort", default="", help="cohort label for results recorded with --store")
+    parser.add_argument("--export", help="also write full results to this .jsonl, .jsonl.gz, .jsonl.zst or .parquet file")
+    parser.add_argument("--quality", action="store_true", help="add a QualityFlags column (straight-lining, inconsistency, ...)")
+    parser.add_argument("--quiet", action="store_true", help="suppress progress output")
+    args = parser.parse_args(argv)
+
+    store = ResultStore(args.store) if args.store else None
+    try:
+        run(
+            args.input,
+            args.output,
+            fmt=args.format,
+            chunk_size=args.chunk_size,
+            checkpoint=args.checkpoint,
+            progress=None if args.quiet else sys.stderr,
+            workers=args.workers,
+            store=store,
+            cohort=args.cohort,
+            export=args.export,
+            quality=args.quality,
+        )
+    finally:
+        if store is not None:
+            store.close()
+
+if __name__ == "__main__":
+    main()
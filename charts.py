@@ -0,0 +1,49 @@
+# charts.py
+# Result-page bar charts, memoized on the score vectors so Streamlit reruns reuse the rendered image.
+from __future__ import annotations
+
+import io
+import os
+from typing import Dict, Tuple
+
+import streamlit as st
+
+# "matplotlib" renders cached PNGs; "native" hands the data to Streamlit's built-in Vega-Lite chart.
+CHART_BACKEND = os.environ.get("HRFIT_CHART_BACKEND", "matplotlib")
+CHART_CACHE_ENTRIES = 512
+CHART_CACHE_TTL = 3600
+
+def _sorted_scores(scores: Dict[str, float]) -> Tuple[Tuple[str, ...], Tuple[float, ...]]:
+    items = sorted(scores.items(), key=lambda x: x[1])
+    return tuple(k for k, _ in items), tuple(v for _, v in items)
+
+def render_bar_png(labels: Tuple[str, ...], values: Tuple[float, ...], xlabel: str) -> bytes:
+    # Figure objects instead of pyplot: no global figure registry to leak or lock across sessions.
+    from matplotlib.figure import Figure
+
+    fig = Figure()
+    ax = fig.subplots()
+    ax.barh(labels, values)
+    ax.set_xlabel(xlabel)
+    fig.tight_layout()
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png")
+    return buf.getvalue()
+
+@st.cache_data(max_entries=CHART_CACHE_ENTRIES, ttl=CHART_CACHE_TTL, show_spinner=False)
+def bar_chart_png(labels: Tuple[str, ...], values: Tuple[float, ...], xlabel: str) -> bytes:
+    return render_bar_png(labels, values, xlabel)
+
+def bar_chart(scores: Dict[str, float], category: str, xlabel: str) -> None:
+    labels, values = _sorted_scores(scores)
+    if CHART_BACKEND == "native":
+        st.bar_chart(
+            {category: labels[::-1], "Score": values[::-1]},
+            x=category,
+            y="Score",
+            y_label=xlabel,
+            horizontal=True,
+            sort=False,
+        )
+    else:
+        st.image(bar_chart_png(labels, values, xlabel), use_container_width=True)
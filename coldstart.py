@@ -0,0 +1,67 @@
+# coldstart.py
+# Measures cold-start cost of the Streamlit app: fresh-interpreter import time of app.py and
+# which heavy libraries the intro/question path pulls in.
+#
+#   python coldstart.py --runs 5
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Optional
+
+HEAVY_MODULES = ("pandas", "matplotlib", "pyarrow")
+
+_PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+import app
+wall = time.perf_counter() - t0
+print(json.dumps({
+    "wall": wall,
+    "app_import": app.IMPORT_SECONDS,
+    "loaded": [m for m in %r if m in sys.modules],
+}))
+"""
+
+def measure(runs: int = 5) -> Dict[str, object]:
+    here = os.path.dirname(os.path.abspath(__file__))
+    samples: List[dict] = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", _PROBE % (HEAVY_MODULES,)],
+            cwd=here,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        samples.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    walls = [s["wall"] for s in samples]
+    return {
+        "runs": runs,
+        "median_s": statistics.median(walls),
+        "min_s": min(walls),
+        "max_s": max(walls),
+        "heavy_modules_loaded": sorted({m for s in samples for m in s["loaded"]}),
+    }
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Measure app.py cold-start import time.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    report = measure(args.runs)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"app import over {report['runs']} cold runs: median {report['median_s']*1000:.0f} ms "
+          f"(min {report['min_s']*1000:.0f}, max {report['max_s']*1000:.0f})")
+    loaded = report["heavy_modules_loaded"]
+    print("heavy modules loaded at import: " + (", ".join(loaded) if loaded else "none"))
+
+if __name__ == "__main__":
+    main()
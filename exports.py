@@ -0,0 +1,216 @@
+# exports.py
+# Download payloads for a single respondent (results JSON and the answers CSV), and streaming
+# writers for bulk exports: JSON Lines (plain, gzip or zstd) and Parquet.
+from __future__ import annotations
+
+import csv
+import gzip
+import io
+import json
+import os
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+import perf
+from questions import FUNCTIONS, LIKERT, TRAITS
+from scoring import BatchScores, ScoreResult, label_code
+
+def _utc_now() -> str:
+    return datetime.utcnow().isoformat() + "Z"
+
+def results_payload(
+    result: ScoreResult, answers: Dict[str, str], timestamp: Optional[str] = None, seconds: Optional[Dict[str, float]] = None
+) -> dict:
+    """`seconds` maps question IDs to the time spent on them; it feeds the speeder check in quality.py."""
+    payload = {
+        "timestamp": timestamp or _utc_now(),
+        "top_functions": result.top_functions,
+        "recommended_level": result.level,
+        "function_scores": result.function_scores,
+        "trait_scores": result.trait_scores,
+        "answers": answers,
+    }
+    if seconds:
+        payload["seconds"] = seconds
+    return payload
+
+@perf.traced("export_json")
+def results_json(
+    result: ScoreResult, answers: Dict[str, str], timestamp: Optional[str] = None, seconds: Optional[Dict[str, float]] = None
+) -> str:
+    return json.dumps(results_payload(result, answers, timestamp, seconds), indent=2)
+
+@perf.traced("export_csv")
+def answers_csv(question_ids: Sequence[str], answers: Dict[str, str]) -> str:
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator="\n")
+    writer.writerow(("QuestionID", "Answer"))
+    writer.writerows((qid, answers.get(qid, "")) for qid in question_ids)
+    return buf.getvalue()
+
+# -- bulk exports ---------------------------------------------------------------------------------
+
+# File suffix -> export kind. JSONL records have the results_payload shape plus "respondent_id", so
+# a JSONL export, compressed or not, can be fed straight back into bulk_score.py.
+EXPORT_KINDS = {".jsonl": "jsonl", ".jsonl.gz": "gzip", ".jsonl.zst": "zstd", ".parquet": "parquet"}
+_LABELS = np.array([""] + list(LIKERT), dtype=object)
+
+def export_kind(path: str) -> str:
+    for suffix, kind in sorted(EXPORT_KINDS.items(), key=lambda item: -len(item[0])):
+        if path.endswith(suffix):
+            return kind
+    raise ValueError(f"{path}: export file must end in one of {', '.join(EXPORT_KINDS)}")
+
+def batch_payloads(
+    scores: BatchScores, codes: np.ndarray, question_ids: Sequence[str], timestamp: Optional[str] = None
+) -> Iterator[dict]:
+    """One results_payload-shaped record per respondent of a scored chunk."""
+    timestamp = timestamp or _utc_now()
+    ids = scores.respondent_ids.tolist() if scores.respondent_ids is not None else [None] * len(scores)
+    labels = _LABELS[np.asarray(codes)]
+    for rid, level, top, top_vals, fs, ts, row in zip(
+        ids,
+        scores.levels.tolist(),
+        scores.top_functions.tolist(),
+        scores.top_function_scores.tolist(),
+        scores.function_scores.tolist(),
+        scores.trait_scores.tolist(),
+        labels.tolist(),
+    ):
+        yield {
+            "respondent_id": rid,
+            "timestamp": timestamp,
+            "top_functions": [list(pair) for pair in zip(top, top_vals)],
+            "recommended_level": level,
+            "function_scores": dict(zip(FUNCTIONS, fs)),
+            "trait_scores": dict(zip(TRAITS, ts)),
+            "answers": {qid: a for qid, a in zip(question_ids, row) if a},
+        }
+
+# Reading payloads back (bulk_score.py json/jsonl inputs and server.py requests).
+
+def json_records(doc: Any) -> List[dict]:
+    """Result records of a JSON document: one payload, a list of payloads, or {"results": [...]}."""
+    records = [doc] if isinstance(doc, dict) and "results" not in doc else (doc["results"] if isinstance(doc, dict) else doc)
+    if not isinstance(records, list) or not all(isinstance(r, dict) for r in records):
+        raise ValueError("expected a results object, a list of them, or {\"results\": [...]}")
+    return records
+
+def payload_codes(
+    records: Sequence[Any], question_ids: Sequence[str]
+) -> Tuple[List[Optional[str]], np.ndarray, np.ndarray]:
+    """Respondent ids (None where absent), answer codes and seconds per question (both records x
+    questions; 0 seconds = not recorded) of payload records."""
+    col = {qid: j for j, qid in enumerate(question_ids)}
+    codes = np.zeros((len(records), len(question_ids)), dtype=np.uint8)
+    seconds = np.zeros((len(records), len(question_ids)))
+    ids: List[Optional[str]] = []
+    for i, record in enumerate(records):
+        if not isinstance(record, dict) or not isinstance(record.get("answers", {}), dict):
+            raise ValueError(f"record {i}: expected an object with an \"answers\" object")
+        if not isinstance(record.get("seconds", {}), dict):
+            raise ValueError(f"record {i}: \"seconds\" must map question IDs to seconds")
+        rid = record.get("respondent_id", record.get("RespondentID"))
+        ids.append(None if rid is None else str(rid))
+        for qid, answer in (record.get("answers") or {}).items():
+            if qid in col and answer is not None:
+                codes[i, col[qid]] = label_code(answer)
+        for qid, spent in (record.get("seconds") or {}).items():
+            if qid in col and isinstance(spent, (int, float)) and spent > 0:
+                seconds[i, col[qid]] = spent
+    return ids, codes, seconds
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError("zstd files need the optional 'zstandard' package (pip install zstandard)") from None
+    return zstandard
+
+def encode_jsonl(
+    scores: BatchScores, codes: np.ndarray, question_ids: Sequence[str], kind: str = "jsonl", timestamp: Optional[str] = None
+) -> bytes:
+    """A scored chunk as JSON Lines, compressed into one self-contained gzip member or zstd frame.
+
+    Compressed files are sequences of these blocks, so they stay readable after being truncated
+    back to any block boundary and appended to (which is how bulk_score.py resumes)."""
+    raw = "".join(
+        json.dumps(record, ensure_ascii=False) + "\n" for record in batch_payloads(scores, codes, question_ids, timestamp)
+    ).encode("utf-8")
+    if kind == "gzip":
+        return gzip.compress(raw, compresslevel=6, mtime=0)
+    if kind == "zstd":
+        return _zstd().ZstdCompressor(level=3).compress(raw)
+    return raw
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("Parquet exports need the optional 'pyarrow' package (pip install pyarrow)") from None
+    return pyarrow
+
+def parquet_table(scores: BatchScores, codes: np.ndarray, question_ids: Sequence[str]):
+    """Columnar form of a scored chunk: one column per score dimension and one uint8 code per question."""
+    pa = _pyarrow()
+    top = scores.top_functions
+    columns = {
+        "respondent_id": pa.array(scores.respondent_ids.tolist() if scores.respondent_ids is not None else [None] * len(scores), pa.string()),
+        "level": pa.array(scores.levels.tolist(), pa.string()),
+        "seniority": pa.array(scores.seniority),
+        "top1": pa.array(top[:, 0].tolist(), pa.string()),
+        "top2": pa.array(top[:, 1].tolist(), pa.string()),
+        "top3": pa.array(top[:, 2].tolist(), pa.string()),
+    }
+    for names, matrix in ((FUNCTIONS, scores.function_scores), (TRAITS, scores.trait_scores)):
+        for j, name in enumerate(names):
+            columns[name] = pa.array(matrix[:, j])
+    codes = np.asarray(codes, dtype=np.uint8)
+    for j, qid in enumerate(question_ids):
+        columns[qid] = pa.array(codes[:, j])
+    return pa.table(columns)
+
+class ExportWriter:
+    """Streams scored chunks to a bulk export file; the file kind comes from its suffix."""
+
+    def __init__(self, path: str, question_ids: Sequence[str], resume_size: Optional[int] = None):
+        self.path = path
+        self.kind = export_kind(path)
+        self.question_ids = list(question_ids)
+        self._parquet = None
+        if self.kind == "zstd":
+            _zstd()
+        if self.kind == "parquet":
+            if resume_size is not None:
+                raise ValueError("Parquet exports cannot be resumed from a checkpoint; use a .jsonl[.gz|.zst] export")
+            _pyarrow()
+            self._file = None
+        elif resume_size is not None and os.path.exists(path):
+            self._file = open(path, "r+b")
+            self._file.truncate(resume_size)
+            self._file.seek(resume_size)
+        else:
+            self._file = open(path, "wb")
+
+    def write(self, scores: BatchScores, codes: np.ndarray, encoded: Optional[bytes] = None) -> None:
+        """Append one chunk; `encoded` is its encode_jsonl() output when a worker already built it."""
+        if self.kind == "parquet":
+            table = parquet_table(scores, codes, self.question_ids)
+            if self._parquet is None:
+                self._parquet = _pyarrow().parquet.ParquetWriter(self.path, table.schema, compression="zstd")
+            self._parquet.write_table(table)
+            return
+        self._file.write(encoded if encoded is not None else encode_jsonl(scores, codes, self.question_ids, self.kind))
+        self._file.flush()
+
+    def tell(self) -> int:
+        return self._file.tell() if self._file is not None else 0
+
+    def close(self) -> None:
+        if self._parquet is not None:
+            self._parquet.close()
+        if self._file is not None:
+            self._file.close()
@@ -0,0 +1,238 @@
+# item_analysis.py
+# Item analysis of the question bank over a response population. It reports Cronbach's alpha per
+# scored dimension, corrected item-total correlations, alpha-if-deleted and response distributions.
+# Everything is derived from streaming sufficient statistics: per-item answer counts, item sums and
+# the item cross-product matrix X'X. These are updated one block at a time with one matrix product,
+# and can be merged across shards, so millions of responses never have to be held in memory at once.
+#
+#   python item_analysis.py build items.npz --store results.db [--cohort X]
+#   python item_analysis.py build items.npz --input answers.csv
+#   python item_analysis.py show items.npz [--min-r 0.2]
+from __future__ import annotations
+
+import argparse
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from bank import BANK, QuestionBank
+from questions import LIKERT
+from scoring import DIMENSIONS, get_model
+
+# Corrected item-total correlations below this mark an item that barely tracks its dimension.
+MIN_ITEM_TOTAL = 0.20
+# Below this many complete responses the covariance estimates are too noisy to act on.
+MIN_SAMPLE = 30
+
+def _weights(bank: QuestionBank) -> np.ndarray:
+    return np.hstack([bank.func_w, bank.trait_w, bank.level_w]).astype(np.float64)
+
+class ItemAnalysis:
+    """Mergeable accumulators over (respondents x questions) answer codes, questions in bank order.
+
+    Reliability statistics use complete responses only (every question answered); the response
+    distributions count every response. Items enter each dimension with their bank weight, so
+    alpha describes the weighted sum the dimension score is actually computed from.
+    """
+
+    def __init__(self, bank: QuestionBank = BANK):
+        q = len(bank)
+        self.bank = bank
+        self.weights = _weights(bank)
+        self.responses = 0
+        self.counts = np.zeros((q, len(LIKERT) + 1), dtype=np.int64)  # column 0: unanswered
+        self.complete = 0
+        self.sums = np.zeros(q)
+        # Sums of integer products are exact in float64 up to 2**53, i.e. for hundreds of
+        # trillions of responses, so the one-pass covariance below cannot lose precision.
+        self.cross = np.zeros((q, q))
+
+    # -- updates --------------------------------------------------------------------------------
+
+    def update(self, codes: np.ndarray) -> None:
+        codes = np.atleast_2d(np.asarray(codes))
+        if codes.shape[1] != len(self.bank):
+            raise ValueError(f"expected {len(self.bank)} answer columns, got {codes.shape[1]}")
+        codes = np.where((codes >= 0) & (codes <= len(LIKERT)), codes, 0).astype(np.int64)
+        q, k = self.counts.shape
+        self.counts += np.bincount((codes + np.arange(q) * k).ravel(), minlength=q * k).reshape(q, k)
+        self.responses += len(codes)
+        x = codes[(codes > 0).all(axis=1)].astype(np.float64)
+        self.complete += len(x)
+        self.sums += x.sum(axis=0)
+        self.cross += x.T @ x
+
+    def update_all(self, blocks: Iterable[np.ndarray]) -> "ItemAnalysis":
+        for block in blocks:
+            self.update(block)
+        return self
+
+    def merge(self, other: "ItemAnalysis") -> None:
+        if other.bank.ids != self.bank.ids:
+            raise ValueError("cannot merge item analyses of different question banks")
+        self.responses += other.responses
+        self.counts += other.counts
+        self.complete += other.complete
+        self.sums += other.sums
+        self.cross += other.cross
+
+    # -- statistics -----------------------------------------------------------------------------
+
+    @property
+    def ready(self) -> bool:
+        return self.complete >= MIN_SAMPLE
+
+    def covariance(self) -> np.ndarray:
+        n = self.complete
+        if n < 2:
+            return np.full(self.cross.shape, np.nan)
+        return (self.cross - np.outer(self.sums, self.sums) / n) / (n - 1)
+
+    def means(self) -> np.ndarray:
+        return self.sums / self.complete if self.complete else np.full(len(self.sums), np.nan)
+
+    def distributions(self) -> np.ndarray:
+        """(questions x Likert options) share of answered responses choosing each option."""
+        answered = self.counts[:, 1:]
+        return answered / np.maximum(answered.sum(axis=1, keepdims=True), 1)
+
+    def missing_rate(self) -> np.ndarray:
+        return self.counts[:, 0] / max(self.responses, 1)
+
+    def _parts(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        c, w = self.covariance(), self.weights
+        item_var = np.diag(c)
+        cw = c @ w                                      # cov(item, dimension total)
+        total_var = np.einsum("id,id->d", w, cw)        # var(dimension total)
+        sum_var = (w * w).T @ item_var                  # sum of weighted item variances
+        return item_var, cw, total_var, sum_var, (w > 0).sum(axis=0)
+
+    def alpha(self) -> Dict[str, float]:
+        """Cronbach's alpha per dimension (NaN for dimensions with fewer than two items)."""
+        _, _, total_var, sum_var, k = self._parts()
+        with np.errstate(divide="ignore", invalid="ignore"):
+            a = np.where(k > 1, k / (k - 1) * (1.0 - sum_var / total_var), np.nan)
+        return dict(zip(DIMENSIONS, a.tolist()))
+
+    def item_total(self) -> np.ndarray:
+        """(questions x dimensions) correlation of each item with the rest of its dimension's total.
+
+        NaN where the item does not load on the dimension."""
+        item_var, cw, total_var, _, _ = self._parts()
+        w = self.weights
+        rest_cov = cw - w * item_var[:, None]
+        rest_var = total_var[None, :] - 2 * w * cw + w * w * item_var[:, None]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            r = rest_cov / np.sqrt(item_var[:, None] * rest_var)
+        return np.where(w > 0, r, np.nan)
+
+    def alpha_if_deleted(self) -> np.ndarray:
+        """(questions x dimensions) alpha of each dimension with the item removed; NaN where it does not load."""
+        item_var, cw, total_var, sum_var, k = self._parts()
+        w = self.weights
+        rest_var = total_var[None, :] - 2 * w * cw + w * w * item_var[:, None]
+        rest_sum = sum_var[None, :] - w * w * item_var[:, None]
+        k = (k - 1)[None, :]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            a = np.where(k > 1, k / (k - 1) * (1.0 - rest_sum / rest_var), np.nan)
+        return np.where(w > 0, a, np.nan)
+
+    def flagged(self, min_r: float = MIN_ITEM_TOTAL) -> List[Tuple[str, str, float, float]]:
+        """(question ID, dimension, item-total r, alpha gain if deleted) for weakly discriminating items."""
+        r = self.item_total()
+        gain = self.alpha_if_deleted() - np.array([self.alpha()[d] for d in DIMENSIONS])[None, :]
+        out = []
+        for i, j in zip(*np.nonzero(np.nan_to_num(r, nan=np.inf) < min_r)):
+            out.append((self.bank.ids[i], DIMENSIONS[j], float(r[i, j]), float(gain[i, j])))
+        return sorted(out, key=lambda row: row[2])
+
+    def report(self, min_r: float = MIN_ITEM_TOTAL) -> str:
+        lines = [f"{self.responses:,} responses, {self.complete:,} complete"]
+        if not self.ready:
+            return "\n".join(lines + [f"need at least {MIN_SAMPLE} complete responses for reliability estimates"])
+        k = (self.weights > 0).sum(axis=0)
+        lines += ["", f"{'dimension':<32}{'items':>6}{'alpha':>8}"]
+        for (d, a), n_items in zip(self.alpha().items(), k.tolist()):
+            lines.append(f"{d:<32}{n_items:>6}{a:>8.3f}")
+        flags = self.flagged(min_r)
+        lines += ["", f"items with corrected item-total r < {min_r:.2f}: {len(flags)}"]
+        for qid, d, r, gain in flags:
+            note = f"  (alpha +{gain:.3f} without it)" if gain > 0 else ""
+            lines.append(f"  {qid:<6}{d:<32}r={r:>6.3f}{note}")
+        dist, missing, means = self.distributions(), self.missing_rate(), self.means()
+        lines += ["", f"{'item':<6}{'mean':>6}" + "".join(f"{v:>6}" for v in range(1, len(LIKERT) + 1)) + f"{'missing':>9}"]
+        for i, qid in enumerate(self.bank.ids):
+            shares = "".join(f"{s:>6.0%}" for s in dist[i].tolist())
+            lines.append(f"{qid:<6}{means[i]:>6.2f}{shares}{missing[i]:>9.1%}")
+        return "\n".join(lines)
+
+    # -- persistence ----------------------------------------------------------------------------
+
+    @classmethod
+    def from_store(cls, store, cohort: Optional[str] = None, bank: QuestionBank = BANK) -> "ItemAnalysis":
+        # Only rows recorded with this bank: answer codes are positional.
+        return cls(bank).update_all(store.iter_answer_codes(len(bank), cohort, bank_version=get_model(bank).version))
+
+    @classmethod
+    def from_file(cls, path: str) -> "ItemAnalysis":
+        from bulk_score import iter_code_blocks
+
+        return cls(BANK).update_all(iter_code_blocks(path))
+
+    def save(self, path: str) -> None:
+        with open(path, "wb") as f:
+            np.savez_compressed(
+                f,
+                ids=np.array(self.bank.ids),
+                responses=self.responses,
+                counts=self.counts,
+                complete=self.complete,
+                sums=self.sums,
+                cross=self.cross,
+            )
+
+    @classmethod
+    def load(cls, path: str, bank: QuestionBank = BANK) -> "ItemAnalysis":
+        with np.load(path, allow_pickle=False) as data:
+            if tuple(str(s) for s in data["ids"]) != bank.ids:
+                raise ValueError(f"{path}: item statistics were built for a different question bank")
+            out = cls(bank)
+            out.responses = int(data["responses"])
+            out.counts = data["counts"].astype(np.int64)
+            out.complete = int(data["complete"])
+            out.sums = data["sums"].astype(np.float64)
+            out.cross = data["cross"].astype(np.float64)
+        return out
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Reliability and item analysis of the question bank.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="accumulate item statistics from stored results or an answers file")
+    build.add_argument("path", help="output statistics file (.npz)")
+    src = build.add_mutually_exclusive_group(required=True)
+    src.add_argument("--store", help="SQLite result store (see store.py)")
+    src.add_argument("--input", help="answers file in any bulk_score.py input format")
+    build.add_argument("--cohort", help="restrict a --store population to one cohort")
+    show = sub.add_parser("show", help="print alpha, flagged items and response distributions")
+    show.add_argument("path")
+    show.add_argument("--min-r", type=float, default=MIN_ITEM_TOTAL, help="flag items below this item-total r")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        if args.store:
+            from store import ResultStore
+
+            store = ResultStore(args.store)
+            try:
+                analysis = ItemAnalysis.from_store(store, args.cohort)
+            finally:
+                store.close()
+        else:
+            analysis = ItemAnalysis.from_file(args.input)
+        analysis.save(args.path)
+        print(f"wrote {args.path} ({analysis.responses:,} responses, {analysis.complete:,} complete)")
+    else:
+        print(ItemAnalysis.load(args.path).report(args.min_r))
+
+if __name__ == "__main__":
+    main()
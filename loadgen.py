@@ -0,0 +1,99 @@
+# loadgen.py
+# Load generator for server.py: N keep-alive connections each send POST /score requests with
+# synthetic answer sets for a fixed duration, then report throughput and latency percentiles.
+#
+#   python server.py --port 8080 &
+#   python loadgen.py --url http://127.0.0.1:8080 --connections 64 --batch 1 --duration 10
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+from typing import List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import numpy as np
+
+from bench import synthetic_answers
+
+class LoadResult:
+    def __init__(self, latencies: List[float], respondents: int, errors: int, seconds: float):
+        self.latencies = latencies
+        self.respondents = respondents
+        self.errors = errors
+        self.seconds = seconds
+
+    def report(self) -> str:
+        lat = np.array(self.latencies) * 1000 if self.latencies else np.zeros(1)
+        p50, p95, p99 = np.percentile(lat, (50, 95, 99)).tolist()
+        return (
+            f"{len(self.latencies):,} requests, {self.respondents:,} respondents, {self.errors} errors in {self.seconds:.1f}s\n"
+            f"  {len(self.latencies) / self.seconds:,.0f} req/s, {self.respondents / self.seconds:,.0f} respondents/s\n"
+            f"  latency ms: p50 {p50:.2f}  p95 {p95:.2f}  p99 {p99:.2f}  max {lat.max():.2f}"
+        )
+
+async def _request(reader, writer, host: str, body: bytes) -> Tuple[int, bytes]:
+    writer.write(
+        f"POST /score HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n".encode("latin-1")
+        + body
+    )
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value)
+    return status, await reader.readexactly(length)
+
+async def _worker(host: str, port: int, bodies: List[bytes], batch: int, stop_at: float, out: LoadResult, offset: int) -> None:
+    reader, writer = await asyncio.open_connection(host, port)
+    i = offset
+    try:
+        while time.perf_counter() < stop_at:
+            t0 = time.perf_counter()
+            status, _ = await _request(reader, writer, host, bodies[i % len(bodies)])
+            if status == 200:
+                out.latencies.append(time.perf_counter() - t0)
+                out.respondents += batch
+            else:
+                out.errors += 1
+            i += 1
+    finally:
+        writer.close()
+
+async def run(url: str, connections: int = 32, batch: int = 1, duration: float = 10.0, distinct: int = 1000) -> LoadResult:
+    parts = urlsplit(url)
+    host, port = parts.hostname or "127.0.0.1", parts.port or 80
+    answers = synthetic_answers(max(distinct, batch))
+    records = [{"respondent_id": str(i), "answers": a} for i, a in enumerate(answers)]
+    if batch == 1:
+        bodies = [json.dumps(r).encode("utf-8") for r in records]
+    else:
+        bodies = [json.dumps(records[i : i + batch]).encode("utf-8") for i in range(0, len(records) - batch + 1, batch)]
+
+    out = LoadResult([], 0, 0, 0.0)
+    t0 = time.perf_counter()
+    stop_at = t0 + duration
+    await asyncio.gather(*(_worker(host, port, bodies, batch, stop_at, out, c * 7) for c in range(connections)))
+    out.seconds = time.perf_counter() - t0
+    return out
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Load-test the scoring service (server.py).")
+    parser.add_argument("--url", default="http://127.0.0.1:8080")
+    parser.add_argument("--connections", type=int, default=32, help="concurrent keep-alive connections")
+    parser.add_argument("--batch", type=int, default=1, help="respondents per request")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds to run")
+    parser.add_argument("--distinct", type=int, default=1000, help="distinct synthetic answer sets to cycle through")
+    args = parser.parse_args(argv)
+
+    result = asyncio.run(run(args.url, args.connections, args.batch, args.duration, args.distinct))
+    print(result.report())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+# matching.py
+# Nearest-neighbour matching of score vectors (function + trait + level scores, DIMENSIONS order)
+# against reference role profiles or past respondents. Small libraries are searched exactly with
+# one matrix product; large ones (APPROX_THRESHOLD and up) use an inverted-file index: k-means
+# centroids partition the library, and a query only scans the lists of its nprobe nearest centroids.
+#
+#   python matching.py build past.npz --store results.db [--cohort X] [--level "Lead / Manager"]
+#   python matching.py query past.npz answers.jsonl -k 5
+from __future__ import annotations
+
+import argparse
+import json
+import math
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from scoring import DIMENSIONS, BatchScores, ScoreResult, ScoringModel
+
+APPROX_THRESHOLD = 100_000
+DEFAULT_NPROBE = 16
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLE = 64 * 1024
+# Distances are computed in blocks of this many rows to bound the (rows x queries) working set.
+SEARCH_BLOCK = 65536
+
+@dataclass(frozen=True)
+class Match:
+    label: str
+    distance: float
+
+    @property
+    def mean_gap(self) -> float:
+        """Root-mean-square score difference per dimension, in points."""
+        return self.distance / math.sqrt(len(DIMENSIONS))
+
+Query = Union[ScoreResult, np.ndarray]
+
+def _as_matrix(queries: Union[Query, Sequence[ScoreResult], BatchScores]) -> np.ndarray:
+    if isinstance(queries, ScoreResult):
+        return queries.vector()[None, :].astype(np.float32)
+    if isinstance(queries, BatchScores):
+        return queries.matrix().astype(np.float32)
+    if isinstance(queries, (list, tuple)) and queries and isinstance(queries[0], ScoreResult):
+        return np.stack([q.vector() for q in queries]).astype(np.float32)
+    return np.atleast_2d(np.asarray(queries, dtype=np.float32))
+
+def _sq_norms(x: np.ndarray) -> np.ndarray:
+    return np.einsum("ij,ij->i", x, x)
+
+def _nearest(vectors: np.ndarray, norms: np.ndarray, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Exact k nearest rows of `vectors` per query: (indices, squared distances), nearest first."""
+    n = len(vectors)
+    k = min(k, n)
+    best_i = np.zeros((len(queries), 0), dtype=np.int64)
+    best_d = np.zeros((len(queries), 0), dtype=np.float32)
+    q_norms = _sq_norms(queries)
+    for start in range(0, n, SEARCH_BLOCK):
+        block = vectors[start : start + SEARCH_BLOCK]
+        d = norms[start : start + SEARCH_BLOCK][None, :] - 2.0 * (queries @ block.T) + q_norms[:, None]
+        kk = min(k, d.shape[1])
+        part = np.argpartition(d, kk - 1, axis=1)[:, :kk]
+        best_i = np.hstack([best_i, part + start])
+        best_d = np.hstack([best_d, np.take_along_axis(d, part, axis=1)])
+        if best_i.shape[1] > k:
+            keep = np.argpartition(best_d, k - 1, axis=1)[:, :k]
+            best_i = np.take_along_axis(best_i, keep, axis=1)
+            best_d = np.take_along_axis(best_d, keep, axis=1)
+    order = np.argsort(best_d, axis=1, kind="stable")
+    return np.take_along_axis(best_i, order, axis=1), np.maximum(np.take_along_axis(best_d, order, axis=1), 0.0)
+
+def _kmeans(vectors: np.ndarray, n_lists: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    sample = vectors[rng.choice(len(vectors), min(len(vectors), KMEANS_SAMPLE), replace=False)]
+    centroids = sample[rng.choice(len(sample), n_lists, replace=False)].copy()
+    for _ in range(KMEANS_ITERATIONS):
+        assign = _nearest(centroids, _sq_norms(centroids), sample, 1)[0][:, 0]
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, sample)
+        counts = np.bincount(assign, minlength=n_lists)
+        filled = counts > 0
+        centroids[filled] = sums[filled] / counts[filled, None]
+    return centroids
+
+class ProfileIndex:
+    """k-nearest-neighbour search over labelled score vectors (Euclidean distance)."""
+
+    def __init__(self, labels: Sequence[str], vectors: np.ndarray, centroids: Optional[np.ndarray] = None, lists: Optional[np.ndarray] = None):
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if vectors.ndim != 2 or vectors.shape[1] != len(DIMENSIONS):
+            raise ValueError(f"profile vectors must be n x {len(DIMENSIONS)}, got {vectors.shape}")
+        if len(labels) != len(vectors):
+            raise ValueError(f"{len(labels)} labels for {len(vectors)} profile vectors")
+        self.labels = list(labels)
+        self.vectors = vectors
+        self.norms = _sq_norms(vectors)
+        # Inverted file: rows are stored grouped by centroid; lists[c]:lists[c+1] is centroid c's range.
+        self.centroids = centroids
+        self.lists = lists
+
+    @classmethod
+    def build(cls, labels: Sequence[str], vectors: np.ndarray, approximate: Optional[bool] = None, seed: int = 0) -> "ProfileIndex":
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if approximate is None:
+            approximate = len(vectors) >= APPROX_THRESHOLD
+        if not approximate or len(vectors) < 2:
+            return cls(labels, vectors)
+        n_lists = max(1, int(math.sqrt(len(vectors))))
+        centroids = _kmeans(vectors, n_lists, seed)
+        assign = np.concatenate([
+            _nearest(centroids, _sq_norms(centroids), vectors[s : s + SEARCH_BLOCK], 1)[0][:, 0]
+            for s in range(0, len(vectors), SEARCH_BLOCK)
+        ])
+        order = np.argsort(assign, kind="stable")
+        lists = np.zeros(n_lists + 1, dtype=np.int64)
+        lists[1:] = np.cumsum(np.bincount(assign, minlength=n_lists))
+        labels = np.asarray(labels, dtype=object)[order].tolist()
+        return cls(labels, vectors[order], centroids, lists)
+
+    @property
+    def approximate(self) -> bool:
+        return self.centroids is not None
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+    def search(self, queries, k: int = 5, nprobe: int = DEFAULT_NPROBE) -> Tuple[np.ndarray, np.ndarray]:
+        """(indices, distances) of the k nearest profiles per query row, nearest first."""
+        q = _as_matrix(queries)
+        if not self.approximate:
+            idx, d2 = _nearest(self.vectors, self.norms, q, k)
+            return idx, np.sqrt(d2)
+        probes = _nearest(self.centroids, _sq_norms(self.centroids), q, nprobe)[0]
+        out_i = np.full((len(q), k), -1, dtype=np.int64)
+        out_d = np.full((len(q), k), np.inf, dtype=np.float32)
+        for r in range(len(q)):
+            cand = np.concatenate([np.arange(self.lists[c], self.lists[c + 1]) for c in probes[r]])
+            if not len(cand):
+                continue
+            idx, d2 = _nearest(self.vectors[cand], self.norms[cand], q[r : r + 1], k)
+            out_i[r, : idx.shape[1]] = cand[idx[0]]
+            out_d[r, : idx.shape[1]] = np.sqrt(d2[0])
+        return out_i, out_d
+
+    def query(self, result: Query, k: int = 5, nprobe: int = DEFAULT_NPROBE) -> List[Match]:
+        idx, dist = self.search(result, k, nprobe)
+        return [Match(self.labels[i], float(d)) for i, d in zip(idx[0].tolist(), dist[0].tolist()) if i >= 0]
+
+    # -- persistence ----------------------------------------------------------------------------
+
+    def save(self, path: str) -> None:
+        arrays = {"labels": np.array(self.labels), "vectors": self.vectors, "dimensions": np.array(DIMENSIONS)}
+        if self.approximate:
+            arrays.update(centroids=self.centroids, lists=self.lists)
+        with open(path, "wb") as f:
+            np.savez(f, **arrays)
+
+    @classmethod
+    def load(cls, path: str) -> "ProfileIndex":
+        with np.load(path, allow_pickle=False) as data:
+            if [str(d) for d in data["dimensions"]] != DIMENSIONS:
+                raise ValueError(f"{path}: index was built for a different set of dimensions")
+            centroids = data["centroids"] if "centroids" in data else None
+            lists = data["lists"] if "lists" in data else None
+            return cls([str(s) for s in data["labels"]], data["vectors"], centroids, lists)
+
+def role_profiles(model: ScoringModel, level_values: Sequence[int] = (2, 3, 4, 5)) -> Tuple[List[str], np.ndarray]:
+    """Reference profiles derived from the bank: for each function, a respondent who strongly agrees
+    with that function's statements and answers the level statements at each of `level_values`."""
+    from questions import FUNCTIONS, LEVEL_DIMS
+    from scoring import LEVEL_LABELS
+
+    func_items = model.func_w > 0
+    level_items = (model.level_w > 0).any(axis=1)
+    labels: List[str] = []
+    rows: List[np.ndarray] = []
+    for j, name in enumerate(FUNCTIONS):
+        for v in level_values:
+            values = np.where(func_items[:, j], 5.0, 2.0)
+            values[level_items & ~func_items[:, j]] = v
+            result = model.score_values(values)
+            labels.append(f"{name} — {result.level}")
+            rows.append(result.vector())
+    # Different level answers can land on the same level label; keep one profile per label.
+    seen = {}
+    for label, row in zip(labels, rows):
+        seen.setdefault(label, row)
+    return list(seen), np.array(list(seen.values()))
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Build or query a nearest-profile index.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="index stored results (see store.py)")
+    build.add_argument("path", help="output index file (.npz)")
+    build.add_argument("--store", required=True)
+    build.add_argument("--cohort")
+    build.add_argument("--level", help="only index results with this recommended level")
+    build.add_argument("--exact", action="store_true", help="never build the approximate index")
+    query = sub.add_parser("query", help="nearest profiles for each record of a results JSONL file")
+    query.add_argument("path", help="index file (.npz)")
+    query.add_argument("results", help="JSONL with an \"answers\" object per line (e.g. a bulk_score.py --export)")
+    query.add_argument("-k", type=int, default=5)
+    query.add_argument("--nprobe", type=int, default=DEFAULT_NPROBE)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        from store import ResultStore
+
+        store = ResultStore(args.store)
+        try:
+            labels, vectors = store.vectors(args.cohort, args.level)
+        finally:
+            store.close()
+        index = ProfileIndex.build(labels, vectors, approximate=False if args.exact else None)
+        index.save(args.path)
+        print(f"wrote {args.path} ({len(index):,} profiles, {'approximate' if index.approximate else 'exact'})")
+        return
+
+    from bank import BANK
+    from scoring import get_model
+
+    model = get_model(BANK)
+    index = ProfileIndex.load(args.path)
+    with open(args.results, "r", encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            answers = {qid: a for qid, a in (record.get("answers") or {}).items() if a is not None}
+            matches = index.query(model.score(answers), args.k, args.nprobe)
+            print(json.dumps({
+                "respondent_id": record.get("respondent_id"),
+                "matches": [{"label": m.label, "distance": round(m.distance, 2)} for m in matches],
+            }))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+# norms.py
+# Percentile norms: per-dimension score distributions from a reference population, kept as
+# 0.1-point count histograms (the same buckets as store.score_hist) plus a cumulative table that
+# turns any score into a percentile with one array lookup. New results are folded in by adding
+# their bucket counts, so norms never need the full result history to stay current.
+#
+#   python norms.py build norms.npz --store results.db [--cohort X]   # snapshot norms from a store
+#   python norms.py show norms.npz                                    # sample size + quartiles
+from __future__ import annotations
+
+import argparse
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from scoring import DIMENSIONS, BatchScores, ScoreResult
+from store import HIST_BUCKETS, HIST_RESOLUTION
+
+# Below this many reference results a percentile says more about the sample than the person.
+MIN_SAMPLE = 30
+
+class Norms:
+    """Count histograms (dimensions x HIST_BUCKETS) with a lazily rebuilt cumulative table."""
+
+    def __init__(self, counts: Optional[np.ndarray] = None, cohort: str = ""):
+        if counts is None:
+            counts = np.zeros((len(DIMENSIONS), HIST_BUCKETS), dtype=np.int64)
+        if counts.shape != (len(DIMENSIONS), HIST_BUCKETS):
+            raise ValueError(f"norm counts must be {len(DIMENSIONS)} x {HIST_BUCKETS}, got {counts.shape}")
+        self.counts = counts.astype(np.int64, copy=True)
+        self.cohort = cohort
+        self._lock = threading.Lock()
+        self._below: Optional[np.ndarray] = None
+        self._col = {d: j for j, d in enumerate(DIMENSIONS)}
+
+    @property
+    def n(self) -> int:
+        return int(self.counts[0].sum())
+
+    @property
+    def ready(self) -> bool:
+        return self.n >= MIN_SAMPLE
+
+    # -- updates --------------------------------------------------------------------------------
+
+    def update(self, scores: np.ndarray) -> None:
+        """Fold an (n x dimensions) score matrix, columns in DIMENSIONS order, into the norms."""
+        scores = np.atleast_2d(np.asarray(scores, dtype=np.float64))
+        buckets = np.clip((scores * HIST_RESOLUTION).astype(np.int64), 0, HIST_BUCKETS - 1)
+        with self._lock:
+            for j in range(buckets.shape[1]):
+                self.counts[j] += np.bincount(buckets[:, j], minlength=HIST_BUCKETS)
+            self._below = None
+
+    def add_result(self, result: ScoreResult) -> None:
+        self.update(result.vector())
+
+    def add_batch(self, scores: BatchScores) -> None:
+        self.update(scores.matrix())
+
+    def merge(self, other: "Norms") -> None:
+        with self._lock:
+            self.counts += other.counts
+            self._below = None
+
+    # -- lookups --------------------------------------------------------------------------------
+
+    def _table(self) -> np.ndarray:
+        # Mid-rank cumulative share per bucket: everything below it plus half of the bucket itself.
+        table = self._below
+        if table is None:
+            with self._lock:
+                counts = self.counts.astype(np.float64)
+                total = np.maximum(counts.sum(axis=1, keepdims=True), 1.0)
+                table = (np.cumsum(counts, axis=1) - counts / 2.0) / total * 100.0
+                self._below = table
+        return table
+
+    def percentile(self, dimension: str, score: float) -> float:
+        """Share of the reference population (0-100) scoring below `score`, ties counted as half."""
+        bucket = min(max(int(score * HIST_RESOLUTION), 0), HIST_BUCKETS - 1)
+        return float(self._table()[self._col[dimension], bucket])
+
+    def percentiles(self, scores: Dict[str, float]) -> Dict[str, float]:
+        return {d: self.percentile(d, s) for d, s in scores.items() if d in self._col}
+
+    def result_percentiles(self, result: ScoreResult) -> Dict[str, float]:
+        return {
+            **self.percentiles(result.function_scores),
+            **self.percentiles(result.trait_scores),
+            **self.percentiles(result.level_scores),
+        }
+
+    def batch_percentiles(self, scores: np.ndarray) -> np.ndarray:
+        """Percentiles for an (n x dimensions) score matrix, columns in DIMENSIONS order."""
+        scores = np.atleast_2d(np.asarray(scores, dtype=np.float64))
+        buckets = np.clip((scores * HIST_RESOLUTION).astype(np.int64), 0, HIST_BUCKETS - 1)
+        return np.take_along_axis(self._table(), buckets.T, axis=1).T
+
+    def quantile(self, dimension: str, q: float) -> float:
+        """Score at percentile q (0-100); binary search over the cumulative counts."""
+        cum = np.cumsum(self.counts[self._col[dimension]])
+        if not cum[-1]:
+            return 0.0
+        return float(np.searchsorted(cum, cum[-1] * q / 100.0)) / HIST_RESOLUTION
+
+    # -- persistence ----------------------------------------------------------------------------
+
+    @classmethod
+    def from_store(cls, store, cohort: Optional[str] = None) -> "Norms":
+        counts = np.stack([store.histogram(d, cohort) for d in DIMENSIONS])
+        return cls(counts, cohort or "")
+
+    @classmethod
+    def load(cls, path: str) -> "Norms":
+        with np.load(path, allow_pickle=False) as data:
+            dims = [str(d) for d in data["dimensions"]]
+            if dims != DIMENSIONS or int(data["resolution"]) != HIST_RESOLUTION:
+                raise ValueError(f"{path}: norms were built for a different set of dimensions or resolution")
+            return cls(data["counts"], str(data["cohort"]))
+
+    def save(self, path: str) -> None:
+        with self._lock:
+            counts = self.counts.copy()
+        with open(path, "wb") as f:
+            np.savez_compressed(
+                f, counts=counts, dimensions=np.array(DIMENSIONS), resolution=HIST_RESOLUTION, cohort=self.cohort
+            )
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Build or inspect percentile norms.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="snapshot norms from a result store")
+    build.add_argument("path", help="output norms file (.npz)")
+    build.add_argument("--store", required=True, help="SQLite result store (see store.py)")
+    build.add_argument("--cohort", help="restrict to one cohort (default: all results)")
+    show = sub.add_parser("show", help="print sample size and quartiles")
+    show.add_argument("path")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        from store import ResultStore
+
+        store = ResultStore(args.store)
+        try:
+            norms = Norms.from_store(store, args.cohort)
+        finally:
+            store.close()
+        norms.save(args.path)
+        print(f"wrote {args.path} (n={norms.n:,})")
+    else:
+        norms = Norms.load(args.path)
+        print(f"cohort={norms.cohort!r} n={norms.n:,}")
+        for d in DIMENSIONS:
+            q1, q2, q3 = (norms.quantile(d, q) for q in (25, 50, 75))
+            print(f"  {d:<32}{q1:>7.1f}{q2:>7.1f}{q3:>7.1f}")
+
+if __name__ == "__main__":
+    main()
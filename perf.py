@@ -0,0 +1,187 @@
+# perf.py
+# Opt-in hot-path instrumentation: per-stage latency histograms and counts, exposed as
+# Prometheus text, a periodic JSON dump, and a per-rerun breakdown for the developer overlay.
+#
+#   HRFIT_PERF=1                    enable timing (off by default; disabled timers cost one branch)
+#   HRFIT_METRICS_PORT=9464         serve /metrics (Prometheus text) and /metrics.json
+#   HRFIT_PERF_DUMP=perf.json       rewrite this file with a JSON snapshot ...
+#   HRFIT_PERF_DUMP_INTERVAL=30     ... every N seconds
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+ENABLED = os.environ.get("HRFIT_PERF", "") not in ("", "0")
+
+# Upper bounds in seconds; the last bucket is +Inf.
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+class Histogram:
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float) -> None:
+        i = 0
+        while i < len(BUCKETS) and seconds > BUCKETS[i]:
+            i += 1
+        self.counts[i] += 1
+        self.total += seconds
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Upper bucket bound containing quantile q (coarse, like Prometheus' histogram_quantile)."""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= target:
+                return BUCKETS[i] if i < len(BUCKETS) else float("inf")
+        return float("inf")
+
+class Registry:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._stages: Dict[str, Histogram] = {}
+
+    def observe(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            hist = self._stages.get(stage)
+            if hist is None:
+                hist = self._stages[stage] = Histogram()
+            hist.observe(seconds)
+
+    def snapshot(self) -> Dict[str, dict]:
+        with self._lock:
+            return {
+                stage: {
+                    "count": h.count,
+                    "sum_s": h.total,
+                    "mean_ms": h.total / h.count * 1000 if h.count else 0.0,
+                    "p50_le_ms": h.quantile(0.5) * 1000,
+                    "p95_le_ms": h.quantile(0.95) * 1000,
+                    "buckets": dict(zip([str(b) for b in BUCKETS] + ["+Inf"], h.counts)),
+                }
+                for stage, h in sorted(self._stages.items())
+            }
+
+    def prometheus_text(self) -> str:
+        lines = [
+            "# HELP hrfit_stage_seconds Latency of instrumented app stages.",
+            "# TYPE hrfit_stage_seconds histogram",
+        ]
+        with self._lock:
+            for stage, h in sorted(self._stages.items()):
+                cumulative = 0
+                for bound, c in zip([repr(b) for b in BUCKETS] + ["+Inf"], h.counts):
+                    cumulative += c
+                    lines.append(f'hrfit_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+                lines.append(f'hrfit_stage_seconds_sum{{stage="{stage}"}} {h.total}')
+                lines.append(f'hrfit_stage_seconds_count{{stage="{stage}"}} {h.count}')
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stages.clear()
+
+REGISTRY = Registry()
+
+# Streamlit runs each rerun on its own script thread, so the current rerun's stages live in a thread-local.
+_rerun = threading.local()
+
+def begin_rerun() -> None:
+    _rerun.stages = []
+
+def rerun_breakdown() -> List[Tuple[str, float]]:
+    """(stage, seconds) pairs recorded on this thread since begin_rerun(), in completion order."""
+    return list(getattr(_rerun, "stages", []))
+
+@contextmanager
+def timed(stage: str) -> Iterator[None]:
+    if not ENABLED:
+        yield
+        return
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - t0
+        REGISTRY.observe(stage, elapsed)
+        stages = getattr(_rerun, "stages", None)
+        if stages is not None:
+            stages.append((stage, elapsed))
+
+def traced(stage: str) -> Callable[[Callable], Callable]:
+    def decorate(fn: Callable) -> Callable:
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with timed(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        if self.path.startswith("/metrics.json"):
+            body, ctype = json.dumps(REGISTRY.snapshot()).encode("utf-8"), "application/json"
+        elif self.path.startswith("/metrics"):
+            body, ctype = REGISTRY.prometheus_text().encode("utf-8"), "text/plain; version=0.0.4"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+def start_metrics_server(port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="hrfit-metrics", daemon=True).start()
+    return server
+
+def start_json_dump(path: str, interval: float = 30.0) -> threading.Thread:
+    def loop() -> None:
+        while True:
+            time.sleep(interval)
+            tmp = path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"time": time.time(), "stages": REGISTRY.snapshot()}, f, indent=2)
+            os.replace(tmp, path)
+
+    thread = threading.Thread(target=loop, name="hrfit-perf-dump", daemon=True)
+    thread.start()
+    return thread
+
+_exporters_lock = threading.Lock()
+_exporters_started = False
+
+def start_exporters_from_env() -> None:
+    """Start the metrics endpoint / JSON dump configured in the environment, once per process."""
+    global _exporters_started
+    if not ENABLED:
+        return
+    with _exporters_lock:
+        if _exporters_started:
+            return
+        _exporters_started = True
+        port = os.environ.get("HRFIT_METRICS_PORT")
+        if port:
+            start_metrics_server(int(port))
+        dump: Optional[str] = os.environ.get("HRFIT_PERF_DUMP")
+        if dump:
+            start_json_dump(dump, float(os.environ.get("HRFIT_PERF_DUMP_INTERVAL", "30")))
@@ -0,0 +1,141 @@
+# quality.py
+# Response-quality screening. Scores always look plausible: unanswered questions count as Neutral
+# in compute_scores and the app preselects Neutral. This pass flags answer sets that probably don't
+# reflect the respondent. It is vectorized over respondents: one submission costs well under a
+# millisecond and a batch a few array passes per chunk.
+#
+#   straight_lining  one answer option dominates the answer set
+#   long_string      a long run of identical consecutive answers (bank order)
+#   inconsistent     near-duplicate statements answered far apart
+#   speeder          most questions answered faster than they can be read (needs recorded times:
+#                    the app's, or the optional "seconds" of a results payload in bulk_score.py's
+#                    JSON inputs and server.py requests)
+#   incomplete       many questions left unanswered
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from scoring import AnswerCodes, ScoringModel
+
+STRAIGHT_LINE_SHARE = 0.80  # share of answered questions given the single most common option
+LONG_STRING_RUN = 15  # identical consecutive answers
+# Item pairs whose weight profiles (functions + traits + levels) have at least this cosine similarity
+# measure the same thing; answering them more than INCONSISTENCY_GAP Likert points apart on average
+# (over at least MIN_PAIRS answered pairs) is flagged.
+SIMILAR_ITEMS = 0.90
+INCONSISTENCY_GAP = 2.0
+MIN_PAIRS = 4
+FAST_ANSWER_SECONDS = 1.0  # per question
+SPEEDER_SHARE = 0.50  # of timed questions answered faster than FAST_ANSWER_SECONDS
+MAX_MISSING_SHARE = 0.25
+
+FLAGS = ("straight_lining", "long_string", "inconsistent", "speeder", "incomplete")
+
+@dataclass
+class BatchQuality:
+    """Per-respondent quality metrics and flags; NaN where a metric could not be computed."""
+    modal_share: np.ndarray
+    longest_run: np.ndarray
+    pair_gap: np.ndarray
+    fast_share: np.ndarray
+    missing_share: np.ndarray
+    flags: np.ndarray  # (n x len(FLAGS)) bool
+
+    def __len__(self) -> int:
+        return len(self.flags)
+
+    @property
+    def flagged(self) -> np.ndarray:
+        return self.flags.any(axis=1)
+
+    def flag_names(self, i: int) -> List[str]:
+        return [name for name, on in zip(FLAGS, self.flags[i].tolist()) if on]
+
+    def labels(self) -> List[str]:
+        """';'-joined flag names per respondent, '' for clean answer sets."""
+        return [";".join(self.flag_names(i)) for i in range(len(self))]
+
+    def summary(self) -> Dict[str, int]:
+        return dict(zip(FLAGS, self.flags.sum(axis=0).tolist()))
+
+def similar_pairs(model: ScoringModel, min_similarity: float = SIMILAR_ITEMS) -> Tuple[np.ndarray, np.ndarray]:
+    """(i, j) bank positions of item pairs with near-identical weight profiles, i < j."""
+    w = np.hstack([model.func_w, model.trait_w, model.level_w]).astype(np.float64)
+    norms = np.linalg.norm(w, axis=1, keepdims=True)
+    unit = np.divide(w, norms, out=np.zeros_like(w), where=norms > 0)
+    return np.nonzero(np.triu(unit @ unit.T, k=1) >= min_similarity)
+
+# Pairs per bank version; they depend only on the weights.
+_PAIRS: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+
+def _pairs(model: ScoringModel) -> Tuple[np.ndarray, np.ndarray]:
+    pairs = _PAIRS.get(model.version)
+    if pairs is None:
+        pairs = _PAIRS[model.version] = similar_pairs(model)
+    return pairs
+
+def _longest_run(codes: np.ndarray) -> np.ndarray:
+    # Length of the run of equal answers ending at each column is the column minus the last
+    # column where the run was broken; unanswered questions break runs.
+    n, q = codes.shape
+    if q == 0:
+        return np.zeros(n, dtype=np.int64)
+    cols = np.arange(q)
+    breaks = np.ones((n, q), dtype=bool)
+    breaks[:, 1:] = (codes[:, 1:] != codes[:, :-1]) | (codes[:, 1:] == 0)
+    start = np.maximum.accumulate(np.where(breaks, cols, 0), axis=1)
+    run = np.where(codes > 0, cols - start + 1, 0)
+    return run.max(axis=1)
+
+def check_batch(model: ScoringModel, codes: np.ndarray, seconds: Optional[np.ndarray] = None) -> BatchQuality:
+    """Screen an (n x questions) matrix of answer codes (0 = unanswered, 1-5 = Likert value).
+
+    `seconds` is an optional matching matrix of time spent per question; 0 or NaN means not recorded."""
+    codes = np.atleast_2d(np.asarray(codes))
+    if codes.shape[1] != len(model.question_ids):
+        raise ValueError(f"expected {len(model.question_ids)} answer columns, got {codes.shape[1]}")
+    codes = np.where((codes >= 1) & (codes <= 5), codes, 0).astype(np.int8)
+    n = len(codes)
+
+    option_counts = np.stack([(codes == v).sum(axis=1) for v in range(1, 6)], axis=1)
+    answered = option_counts.sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        modal_share = np.where(answered > 0, option_counts.max(axis=1) / answered, np.nan)
+    longest_run = _longest_run(codes)
+    missing_share = 1.0 - answered / max(codes.shape[1], 1)
+
+    i, j = _pairs(model)
+    both = (codes[:, i] > 0) & (codes[:, j] > 0)
+    n_pairs = both.sum(axis=1)
+    gaps = np.where(both, np.abs(codes[:, i] - codes[:, j]), 0).sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pair_gap = np.where(n_pairs >= MIN_PAIRS, gaps / n_pairs, np.nan)
+
+    if seconds is None:
+        fast_share = np.full(n, np.nan)
+    else:
+        seconds = np.atleast_2d(np.asarray(seconds, dtype=np.float64))
+        timed = (seconds > 0) & (codes > 0)
+        n_timed = timed.sum(axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            fast_share = np.where(n_timed > 0, (timed & (seconds < FAST_ANSWER_SECONDS)).sum(axis=1) / n_timed, np.nan)
+
+    flags = np.stack(
+        [
+            np.nan_to_num(modal_share) >= STRAIGHT_LINE_SHARE,
+            longest_run >= LONG_STRING_RUN,
+            np.nan_to_num(pair_gap) >= INCONSISTENCY_GAP,
+            np.nan_to_num(fast_share) >= SPEEDER_SHARE,
+            missing_share > MAX_MISSING_SHARE,
+        ],
+        axis=1,
+    )
+    return BatchQuality(modal_share, longest_run, pair_gap, fast_share, missing_share, flags)
+
+def check(model: ScoringModel, answers: AnswerCodes, seconds: Optional[np.ndarray] = None) -> List[str]:
+    """Flag names for one answer set (uint8 codes in bank order); empty when it looks genuine."""
+    codes = np.frombuffer(answers, dtype=np.uint8) if not isinstance(answers, np.ndarray) else answers
+    return check_batch(model, codes[None, :], None if seconds is None else np.asarray(seconds)[None, :]).flag_names(0)
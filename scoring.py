@@ -1,8 +1,12 @@
 # scoring.py
 from __future__ import annotations
+import hashlib
 from dataclasses import dataclass
-from typing import Dict, List, Tuple
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
 
+import numpy as np
+
+from bank import QuestionBank
 from questions import FUNCTIONS, TRAITS, LEVEL_DIMS
 
 LIKERT_TO_VALUE = {
@@ -12,6 +16,32 @@ LIKERT_TO_VALUE = {
     "Agree": 4,
     "Strongly Agree": 5,
 }
+VALUE_TO_LIKERT = {v: k for k, v in LIKERT_TO_VALUE.items()}
+
+# Answer sets may also be stored as one uint8 per question (bytes/bytearray, bank order):
+# 0 = unanswered, 1-5 = Likert value.
+AnswerCodes = Union[bytes, bytearray, memoryview, np.ndarray]
+
+# Seniority blend of the level dimensions, and the cut-offs that map it to a level label.
+SENIORITY_WEIGHTS = {
+    "Execution": 0.25,
+    "Ownership": 0.30,
+    "Strategy": 0.25,
+    "Leadership": 0.20,
+}
+LEVEL_THRESHOLDS = [
+    (45.0, "Junior / Entry"),
+    (60.0, "Mid-level / Specialist"),
+    (75.0, "Senior / Lead Specialist"),
+]
+TOP_LEVEL = "Lead / Manager"
+LEVEL_LABELS = [label for _, label in LEVEL_THRESHOLDS] + [TOP_LEVEL]
+
+# Column order of a full score vector (ScoreResult.vector, BatchScores.matrix).
+DIMENSIONS = FUNCTIONS + TRAITS + LEVEL_DIMS
+
+# Respondents scored per block in score_batch; bounds the float working set to a few MB.
+BATCH_CHUNK_SIZE = 65536
 
 @dataclass
 class ScoreResult:
@@ -22,6 +52,111 @@ class ScoreResult:
     level: str
     narrative: str
 
+    def vector(self) -> np.ndarray:
+        return np.array(
+            [self.function_scores[d] for d in FUNCTIONS]
+            + [self.trait_scores[d] for d in TRAITS]
+            + [self.level_scores[d] for d in LEVEL_DIMS]
+        )
+
+@dataclass(frozen=True)
+class ScoringModel:
+    """Question bank compiled into dense weight matrices (questions x dimensions)."""
+    question_ids: Tuple[str, ...]
+    func_w: np.ndarray
+    trait_w: np.ndarray
+    level_w: np.ndarray
+    func_max: np.ndarray
+    trait_max: np.ndarray
+    level_max: np.ndarray
+    version: str = ""
+
+    def answer_values(self, answers: Union[Dict[str, str], AnswerCodes]) -> np.ndarray:
+        # 0 marks an unanswered question, so it adds nothing to the raw totals.
+        if not isinstance(answers, dict):
+            codes = np.frombuffer(answers, dtype=np.uint8) if not isinstance(answers, np.ndarray) else answers
+            if len(codes) != len(self.question_ids):
+                raise ValueError(f"expected {len(self.question_ids)} answer codes, got {len(codes)}")
+            if codes.dtype == np.uint8 and (not len(codes) or codes.max() <= 5):
+                return codes.astype(np.float64)
+            # Out-of-range codes count as Neutral, as in score_batch.
+            return _coerce_codes(codes)
+        return np.array(
+            [LIKERT_TO_VALUE.get(answers[qid], 3) if qid in answers else 0 for qid in self.question_ids],
+            dtype=np.float64,
+        )
+
+    def score(self, answers: Union[Dict[str, str], AnswerCodes]) -> ScoreResult:
+        return self.score_values(self.answer_values(answers))
+
+    def score_values(self, values: np.ndarray) -> ScoreResult:
+        """Score a per-question value vector (0 = unanswered; fractional values allowed)."""
+        return _build_result(
+            _normalize_array(values @ self.func_w, self.func_max),
+            _normalize_array(values @ self.trait_w, self.trait_max),
+            _normalize_array(values @ self.level_w, self.level_max),
+        )
+
+def compile_model(questions: Union[List[dict], QuestionBank]) -> ScoringModel:
+    bank = questions if isinstance(questions, QuestionBank) else QuestionBank.from_dicts(questions)
+    if (bank.functions, bank.traits, bank.level_dims) != (tuple(FUNCTIONS), tuple(TRAITS), tuple(LEVEL_DIMS)):
+        raise ValueError("question bank dimensions do not match questions.FUNCTIONS/TRAITS/LEVEL_DIMS")
+    return ScoringModel(
+        question_ids=bank.ids,
+        func_w=bank.func_w,
+        trait_w=bank.trait_w,
+        level_w=bank.level_w,
+        func_max=5 * bank.func_w.sum(axis=0),
+        trait_max=5 * bank.trait_w.sum(axis=0),
+        level_max=5 * bank.level_w.sum(axis=0),
+        version=_bank_version(bank.ids, (bank.func_w, bank.trait_w, bank.level_w)),
+    )
+
+def _bank_version(question_ids: Tuple[str, ...], matrices: Tuple[np.ndarray, ...]) -> str:
+    h = hashlib.sha1()
+    h.update("\x1f".join(question_ids).encode("utf-8"))
+    for dims in (FUNCTIONS, TRAITS, LEVEL_DIMS):
+        h.update("\x1f".join(dims).encode("utf-8"))
+    for w in matrices:
+        h.update(np.ascontiguousarray(w).tobytes())
+    return h.hexdigest()[:16]
+
+def encode_answers(answers: Dict[str, str], question_ids: Sequence[str]) -> bytearray:
+    codes = bytearray(len(question_ids))
+    for i, qid in enumerate(question_ids):
+        if qid in answers:
+            codes[i] = LIKERT_TO_VALUE.get(answers[qid], 3)
+    return codes
+
+def decode_answers(codes: AnswerCodes, question_ids: Sequence[str]) -> Dict[str, str]:
+    """Answered questions as {question ID: Likert label}, the shape the JSON/CSV exports use."""
+    return {qid: VALUE_TO_LIKERT[c] for qid, c in zip(question_ids, bytes(codes)) if c in VALUE_TO_LIKERT}
+
+def answers_fingerprint(answers: Union[Dict[str, str], AnswerCodes]) -> str:
+    """Stable hash of an answer set, independent of insertion order."""
+    h = hashlib.sha1()
+    if not isinstance(answers, dict):
+        h.update(bytes(answers))
+        return h.hexdigest()
+    for qid, label in sorted(answers.items()):
+        h.update(f"{qid}\x1f{label}\x1e".encode("utf-8"))
+    return h.hexdigest()
+
+# Compiled models keyed by the identity of the question list they were built from.
+# The list itself is kept alongside so an id() can't be recycled by another object.
+_MODELS: Dict[int, Tuple[Union[List[dict], QuestionBank], ScoringModel]] = {}
+_MAX_MODELS = 8
+
+def get_model(questions: Union[List[dict], QuestionBank]) -> ScoringModel:
+    entry = _MODELS.get(id(questions))
+    if entry is None or entry[0] is not questions:
+        entry = (questions, compile_model(questions))
+        if len(_MODELS) >= _MAX_MODELS:
+            # Hot-reloaded banks replace each other; drop the oldest rather than pinning them all.
+            del _MODELS[next(iter(_MODELS))]
+        _MODELS[id(questions)] = entry
+    return entry[1]
+
 def _normalize(raw: Dict[str, float], max_possible: Dict[str, float]) -> Dict[str, float]:
     out: Dict[str, float] = {}
     for k, v in raw.items():
@@ -30,64 +165,27 @@ def _normalize(raw: Dict[str, float], max_possible: Dict[str, float]) -> Dict[st
         out[k] = max(0.0, min(100.0, score))
     return out
 
-def compute_scores(questions: List[dict], answers: Dict[str, str]) -> ScoreResult:
-    func_raw = {f: 0.0 for f in FUNCTIONS}
-    trait_raw = {t: 0.0 for t in TRAITS}
-    level_raw = {d: 0.0 for d in LEVEL_DIMS}
-
-    func_max = {f: 0.0 for f in FUNCTIONS}
-    trait_max = {t: 0.0 for t in TRAITS}
-    level_max = {d: 0.0 for d in LEVEL_DIMS}
-
-    for q in questions:
-        qid = q.get("id")
-
-        for f, w in q.get("func_w", {}).items():
-            if f in func_max:
-                func_max[f] += 5 * float(w)
-        for t, w in q.get("trait_w", {}).items():
-            if t in trait_max:
-                trait_max[t] += 5 * float(w)
-        for d, w in q.get("level_w", {}).items():
-            if d in level_max:
-                level_max[d] += 5 * float(w)
-
-        if not qid or qid not in answers:
-            continue
+def _normalize_array(raw: np.ndarray, max_possible: np.ndarray) -> np.ndarray:
+    positive = max_possible > 0
+    scores = np.divide(raw, max_possible, out=np.zeros(np.broadcast(raw, max_possible).shape), where=positive) * 100.0
+    return np.clip(scores, 0.0, 100.0)
 
-        val = LIKERT_TO_VALUE.get(answers[qid], 3)
+def _seniority(level_scores: Dict[str, float]) -> float:
+    return sum(w * level_scores.get(d, 0.0) for d, w in SENIORITY_WEIGHTS.items())
 
-        for f, w in q.get("func_w", {}).items():
-            if f in func_raw:
-                func_raw[f] += val * float(w)
-        for t, w in q.get("trait_w", {}).items():
-            if t in trait_raw:
-                trait_raw[t] += val * float(w)
-        for d, w in q.get("level_w", {}).items():
-            if d in level_raw:
-                level_raw[d] += val * float(w)
+def _level_label(seniority: float) -> str:
+    for cutoff, label in LEVEL_THRESHOLDS:
+        if seniority < cutoff:
+            return label
+    return TOP_LEVEL
 
-    function_scores = _normalize(func_raw, func_max)
-    trait_scores = _normalize(trait_raw, trait_max)
-    level_scores = _normalize(level_raw, level_max)
+def _build_result(func: np.ndarray, trait: np.ndarray, level_arr: np.ndarray) -> ScoreResult:
+    function_scores = dict(zip(FUNCTIONS, func.tolist()))
+    trait_scores = dict(zip(TRAITS, trait.tolist()))
+    level_scores = dict(zip(LEVEL_DIMS, level_arr.tolist()))
 
     top_functions = sorted(function_scores.items(), key=lambda x: x[1], reverse=True)[:3]
-
-    exec_s = level_scores.get("Execution", 0.0)
-    own_s = level_scores.get("Ownership", 0.0)
-    strat_s = level_scores.get("Strategy", 0.0)
-    lead_s = level_scores.get("Leadership", 0.0)
-
-    seniority = (0.25 * exec_s + 0.30 * own_s + 0.25 * strat_s + 0.20 * lead_s)
-
-    if seniority < 45:
-        level = "Junior / Entry"
-    elif seniority < 60:
-        level = "Mid-level / Specialist"
-    elif seniority < 75:
-        level = "Senior / Lead Specialist"
-    else:
-        level = "Lead / Manager"
+    level = _level_label(_seniority(level_scores))
 
     top_traits = sorted(trait_scores.items(), key=lambda x: x[1], reverse=True)[:2]
     primary_func, primary_score = top_functions[0] if top_functions else ("General HR", 0.0)
@@ -105,3 +203,208 @@ def compute_scores(questions: List[dict], answers: Dict[str, str]) -> ScoreResul
         level=level,
         narrative=narrative,
     )
+
+def compute_scores(questions: Union[List[dict], QuestionBank], answers: Union[Dict[str, str], AnswerCodes]) -> ScoreResult:
+    return get_model(questions).score(answers)
+
+@dataclass
+class BatchScores:
+    """Columnar scores for many respondents; row i lines up with input row i."""
+    function_scores: np.ndarray
+    trait_scores: np.ndarray
+    level_scores: np.ndarray
+    seniority: np.ndarray
+    top_function_idx: np.ndarray
+    level_idx: np.ndarray
+    respondent_ids: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.seniority)
+
+    def matrix(self) -> np.ndarray:
+        """(respondents x DIMENSIONS) score matrix."""
+        return np.hstack([self.function_scores, self.trait_scores, self.level_scores])
+
+    @property
+    def top_functions(self) -> np.ndarray:
+        return np.asarray(FUNCTIONS, dtype=object)[self.top_function_idx]
+
+    @property
+    def top_function_scores(self) -> np.ndarray:
+        return np.take_along_axis(self.function_scores, self.top_function_idx, axis=1)
+
+    @property
+    def levels(self) -> np.ndarray:
+        return np.asarray(LEVEL_LABELS, dtype=object)[self.level_idx]
+
+    def result(self, i: int) -> ScoreResult:
+        return _build_result(self.function_scores[i], self.trait_scores[i], self.level_scores[i])
+
+def _seniority_array(level_scores: np.ndarray) -> np.ndarray:
+    # Same accumulation order as _seniority so batch and single scoring agree at the cut-offs.
+    out = np.zeros(len(level_scores))
+    for d, w in SENIORITY_WEIGHTS.items():
+        out = out + w * level_scores[:, LEVEL_DIMS.index(d)]
+    return out
+
+def _coerce_codes(values: np.ndarray) -> np.ndarray:
+    # 1-5 are Likert values, 0/NaN is unanswered, anything else counts as Neutral.
+    values = np.asarray(values, dtype=np.float64)
+    valid = (values >= 1) & (values <= 5) & (values == np.floor(values))
+    missing = np.isnan(values) | (values == 0)
+    return np.where(valid, values, np.where(missing, 0.0, 3.0))
+
+_CODE_STRINGS = {str(v): v for v in range(6)}
+LABEL_CODES = {**LIKERT_TO_VALUE, **_CODE_STRINGS, "": 0}
+
+def label_code(label: Any) -> int:
+    """Code of one answer: a Likert label, a "0"-"5" code, or a number such as 4.0 (how pandas writes
+    a numeric column with missing cells), coerced like _coerce_codes; unknown text counts as Neutral."""
+    code = LABEL_CODES.get(label) if isinstance(label, str) else None
+    if code is not None:
+        return code
+    try:
+        value = float(label)
+    except (TypeError, ValueError):
+        return 3
+    if value != value or value == 0:
+        return 0
+    return int(value) if 1 <= value <= 5 and value == int(value) else 3
+
+def encode_labels(labels: np.ndarray) -> np.ndarray:
+    """Map Likert labels (or "0"-"5" codes) to codes 0-5; empty/None/NaN becomes 0 (unanswered), unknown text 3."""
+    flat = np.asarray(labels, dtype=object).ravel()
+    missing = np.array([v is None or v == "" or (isinstance(v, float) and v != v) for v in flat], dtype=bool)
+    uniq, inverse = np.unique(flat.astype(str), return_inverse=True)
+    lut = np.array([label_code(u) for u in uniq], dtype=np.uint8)
+    codes = lut[inverse.ravel()]
+    codes[missing] = 0
+    return codes.reshape(np.shape(labels))
+
+def _frame_to_codes(frame, model: ScoringModel) -> Tuple[Optional[np.ndarray], np.ndarray]:
+    import pandas as pd
+
+    id_col = "RespondentID" if "RespondentID" in frame.columns else None
+    if "QuestionID" in frame.columns and "Answer" in frame.columns:
+        # Long format, as written by the "Download Answers (CSV)" export (optionally stacked per respondent).
+        long = frame if id_col else frame.assign(RespondentID=0)
+        frame = long.pivot_table(index="RespondentID", columns="QuestionID", values="Answer", aggfunc="last", sort=False)
+        ids = frame.index.to_numpy() if id_col else None
+    else:
+        ids = frame[id_col].to_numpy() if id_col else None
+
+    codes = np.zeros((len(frame), len(model.question_ids)), dtype=np.uint8)
+    for j, qid in enumerate(model.question_ids):
+        if qid not in frame.columns:
+            continue
+        col = frame[qid]
+        if pd.api.types.is_numeric_dtype(col):
+            codes[:, j] = _coerce_codes(col.to_numpy(dtype=np.float64))
+        else:
+            codes[:, j] = encode_labels(col.to_numpy(dtype=object))
+    return ids, codes
+
+def score_batch(
+    questions: Union[List[dict], QuestionBank],
+    answers,
+    respondent_ids: Optional[Sequence] = None,
+    chunk_size: int = BATCH_CHUNK_SIZE,
+) -> BatchScores:
+    """Score an (N respondents x questions) matrix of Likert codes or a pandas DataFrame.
+
+    Matrix cells are 1-5 with 0 for unanswered. DataFrames may be wide (one column per
+    question ID, labels or codes) or long (QuestionID/Answer rows plus RespondentID).
+    """
+    model = get_model(questions)
+    if hasattr(answers, "columns"):
+        frame_ids, codes = _frame_to_codes(answers, model)
+        if respondent_ids is None:
+            respondent_ids = frame_ids
+    else:
+        codes = np.asarray(answers)
+        if codes.ndim == 1:
+            codes = codes.reshape(1, -1)
+    if codes.shape[1] != len(model.question_ids):
+        raise ValueError(f"expected {len(model.question_ids)} answer columns, got {codes.shape[1]}")
+
+    n = codes.shape[0]
+    func = np.empty((n, len(FUNCTIONS)))
+    trait = np.empty((n, len(TRAITS)))
+    level = np.empty((n, len(LEVEL_DIMS)))
+    seniority = np.empty(n)
+    top_idx = np.empty((n, min(3, len(FUNCTIONS))), dtype=np.intp)
+    level_idx = np.empty(n, dtype=np.uint8)
+    cutoffs = np.array([cutoff for cutoff, _ in LEVEL_THRESHOLDS])
+    clean = codes.dtype == np.uint8 and (n == 0 or codes.max() <= 5)
+    for start in range(0, n, chunk_size):
+        stop = min(start + chunk_size, n)
+        block = codes[start:stop]
+        values = block.astype(np.float64) if clean else _coerce_codes(block)
+        func[start:stop] = _normalize_array(values @ model.func_w, model.func_max)
+        trait[start:stop] = _normalize_array(values @ model.trait_w, model.trait_max)
+        level[start:stop] = _normalize_array(values @ model.level_w, model.level_max)
+        seniority[start:stop] = _seniority_array(level[start:stop])
+        top_idx[start:stop] = np.argsort(-func[start:stop], axis=1, kind="stable")[:, : top_idx.shape[1]]
+        level_idx[start:stop] = np.searchsorted(cutoffs, seniority[start:stop], side="right")
+
+    return BatchScores(
+        function_scores=func,
+        trait_scores=trait,
+        level_scores=level,
+        seniority=seniority,
+        top_function_idx=top_idx,
+        level_idx=level_idx,
+        respondent_ids=None if respondent_ids is None else np.asarray(respondent_ids),
+    )
+
+class ScoreAccumulator:
+    """Running raw totals for one respondent, updated one answer at a time.
+
+    Changing an answer applies only that question's weight rows, so a live preview costs
+    O(weights of one question) instead of a full rescore. Totals stay exact because the
+    weights and Likert values are small integers.
+    """
+
+    def __init__(self, model: ScoringModel):
+        self.model = model
+        self._index = {qid: i for i, qid in enumerate(model.question_ids)}
+        self.values = np.zeros(len(model.question_ids))
+        self.func_raw = np.zeros(len(FUNCTIONS))
+        self.trait_raw = np.zeros(len(TRAITS))
+        self.level_raw = np.zeros(len(LEVEL_DIMS))
+        self.func_answered_max = np.zeros(len(FUNCTIONS))
+
+    def set_answer(self, qid: str, label: Optional[str]) -> None:
+        """Record (or with label=None, clear) the answer to one question."""
+        i = self._index.get(qid)
+        if i is not None:
+            self.set_code(i, 0 if label is None else LIKERT_TO_VALUE.get(label, 3))
+
+    def set_code(self, i: int, code: int) -> None:
+        """Record the Likert code (0 = unanswered) for the question at bank position i."""
+        new = float(code)
+        old = self.values[i]
+        if new == old:
+            return
+        m = self.model
+        delta = new - old
+        self.func_raw += delta * m.func_w[i]
+        self.trait_raw += delta * m.trait_w[i]
+        self.level_raw += delta * m.level_w[i]
+        if (old == 0) != (new == 0):
+            self.func_answered_max += (5.0 if old == 0 else -5.0) * m.func_w[i]
+        self.values[i] = new
+
+    def preview(self) -> Tuple[str, float]:
+        """Current top function, scored against the questions answered so far."""
+        scores = _normalize_array(self.func_raw, self.func_answered_max)
+        best = int(np.argmax(scores))
+        return FUNCTIONS[best], float(scores[best])
+
+    def result(self) -> ScoreResult:
+        m = self.model
+        return _build_result(
+            _normalize_array(self.func_raw, m.func_max),
+            _normalize_array(self.trait_raw, m.trait_max),
+            _normalize_array(self.level_raw, m.level_max),
+        )
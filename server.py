@@ -0,0 +1,264 @@
+# server.py
+# Headless scoring API: a small asyncio HTTP/1.1 server (keep-alive, no framework) that
+# micro-batches concurrent requests into vectorized score_batch calls.
+#
+#   python server.py --port 8080 [--max-batch 1024] [--max-wait-ms 2]
+#
+#   POST /score    {"answers": {...}}                       -> one result
+#                  [{"answers": {...}, ...}, ...]            -> list of results
+#                  {"results": [{"answers": {...}}, ...]}    -> list of results
+#   GET  /stats    request/respondent throughput, latency percentiles, batch sizes
+#   GET  /healthz
+#
+# Request records use the "Download Results (JSON)" shape (only "answers" is read, plus optional
+# "respondent_id" and "seconds"); results come back in the same shape, as written by bulk_score.py
+# --export, plus "quality_flags" (see quality.py; "seconds" enables the speeder check).
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+import perf
+from bank import BANK, QuestionBank
+from exports import batch_payloads, json_records, payload_codes
+from quality import check_batch
+from scoring import get_model, score_batch
+
+MAX_BATCH = 1024
+MAX_WAIT_MS = 2.0
+MAX_BODY_BYTES = 32 * 1024 * 1024
+LATENCY_WINDOW = 10_000
+
+class _TooLarge(Exception):
+    pass
+
+class _BadLength(Exception):
+    pass
+
+class Stats:
+    def __init__(self) -> None:
+        self.started = time.monotonic()
+        self.requests = 0
+        self.respondents = 0
+        self.errors = 0
+        self.batches = 0
+        self.batched_rows = 0
+        self.latencies: deque = deque(maxlen=LATENCY_WINDOW)
+
+    def snapshot(self) -> Dict[str, Any]:
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        lat = np.array(self.latencies) * 1000 if self.latencies else np.zeros(1)
+        p50, p95, p99 = np.percentile(lat, (50, 95, 99)).tolist()
+        return {
+            "uptime_s": round(elapsed, 1),
+            "requests": self.requests,
+            "respondents": self.respondents,
+            "errors": self.errors,
+            "requests_per_s": round(self.requests / elapsed, 1),
+            "respondents_per_s": round(self.respondents / elapsed, 1),
+            "latency_ms": {"p50": round(p50, 3), "p95": round(p95, 3), "p99": round(p99, 3), "window": len(self.latencies)},
+            "batches": self.batches,
+            "mean_batch_rows": round(self.batched_rows / self.batches, 1) if self.batches else 0.0,
+        }
+
+class MicroBatcher:
+    """Coalesces concurrently submitted answer matrices into one score_batch call.
+
+    A batch closes when it reaches max_batch rows or max_wait_ms after its first request arrived,
+    whichever comes first; scoring runs on a worker thread so the event loop keeps accepting."""
+
+    def __init__(self, bank: QuestionBank, stats: Stats, max_batch: int = MAX_BATCH, max_wait_ms: float = MAX_WAIT_MS):
+        self.bank = bank
+        self.stats = stats
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue: "asyncio.Queue[Tuple[np.ndarray, np.ndarray, List[Optional[str]], asyncio.Future]]" = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def submit(self, codes: np.ndarray, seconds: np.ndarray, ids: List[Optional[str]]) -> List[dict]:
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((codes, seconds, ids, future))
+        return await future
+
+    def _score(self, codes: np.ndarray, seconds: np.ndarray, ids: List[Optional[str]]) -> List[dict]:
+        with perf.timed("serve_batch"):
+            scores = score_batch(self.bank, codes, respondent_ids=np.array(ids, dtype=object))
+            quality = check_batch(get_model(self.bank), codes, seconds)
+            payloads = list(batch_payloads(scores, codes, self.bank.ids))
+            for i, payload in enumerate(payloads):
+                payload["quality_flags"] = quality.flag_names(i)
+            return payloads
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            pending = [await self._queue.get()]
+            rows = len(pending[0][0])
+            deadline = loop.time() + self.max_wait
+            while rows < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                pending.append(item)
+                rows += len(item[0])
+
+            codes = np.vstack([c for c, _, _, _ in pending])
+            seconds = np.vstack([s for _, s, _, _ in pending])
+            ids = [rid for _, _, batch_ids, _ in pending for rid in batch_ids]
+            try:
+                results = await loop.run_in_executor(None, self._score, codes, seconds, ids)
+            except Exception as exc:
+                for _, _, _, future in pending:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+            self.stats.batches += 1
+            self.stats.batched_rows += rows
+            start = 0
+            for c, _, _, future in pending:
+                if not future.done():
+                    future.set_result(results[start : start + len(c)])
+                start += len(c)
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+class ScoringServer:
+    def __init__(self, bank: QuestionBank = BANK, max_batch: int = MAX_BATCH, max_wait_ms: float = MAX_WAIT_MS):
+        self.bank = bank
+        self.stats = Stats()
+        self.batcher = MicroBatcher(bank, self.stats, max_batch, max_wait_ms)
+
+    async def start(self, host: str, port: int) -> asyncio.AbstractServer:
+        self.batcher.start()
+        return await asyncio.start_server(self._connection, host, port)
+
+    async def _connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, path, version, headers, body = request
+                status, payload = await self._dispatch(method, path, body)
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                self._write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except _TooLarge:
+            self.stats.errors += 1
+            self._write_response(writer, 413, {"error": f"request body over {MAX_BODY_BYTES} bytes"}, False)
+        except _BadLength as exc:
+            # The body can't be framed, so the connection can't be reused either.
+            self.stats.errors += 1
+            self._write_response(writer, 400, {"error": str(exc)}, False)
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader):
+        line = await reader.readline()
+        if not line:
+            return None
+        try:
+            method, path, version = line.decode("latin-1").split()
+        except ValueError:
+            return None
+        headers: Dict[str, str] = {}
+        while True:
+            h = await reader.readline()
+            if h in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = h.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        raw_length = headers.get("content-length", "") or "0"
+        if not (raw_length.isascii() and raw_length.isdigit()):
+            raise _BadLength(f"Content-Length must be a non-negative integer, got {raw_length!r}")
+        length = int(raw_length)
+        if length > MAX_BODY_BYTES:
+            raise _TooLarge()
+        body = await reader.readexactly(length) if length else b""
+        return method, path.split("?", 1)[0], version, headers, body
+
+    async def _dispatch(self, method: str, path: str, body: bytes) -> Tuple[int, Any]:
+        if path == "/healthz":
+            return 200, {"ok": True, "questions": len(self.bank)}
+        if path == "/stats":
+            return 200, self.stats.snapshot()
+        if path != "/score":
+            return 404, {"error": f"no route for {path}"}
+        if method != "POST":
+            return 405, {"error": "POST answers to /score"}
+
+        t0 = time.perf_counter()
+        try:
+            doc = json.loads(body)
+            single = isinstance(doc, dict) and "results" not in doc
+            records = json_records(doc)
+            ids, codes, seconds = payload_codes(records, self.bank.ids)
+        except (ValueError, KeyError) as exc:
+            self.stats.errors += 1
+            return 400, {"error": str(exc)}
+        try:
+            results = await self.batcher.submit(codes, seconds, ids) if len(records) else []
+        except Exception as exc:
+            self.stats.errors += 1
+            return 500, {"error": str(exc)}
+        self.stats.requests += 1
+        self.stats.respondents += len(records)
+        self.stats.latencies.append(time.perf_counter() - t0)
+        return 200, results[0] if single else results
+
+    @staticmethod
+    def _write_response(writer: asyncio.StreamWriter, status: int, payload: Any, keep_alive: bool) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        head = (
+            f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+
+async def serve(host: str, port: int, bank: QuestionBank = BANK, max_batch: int = MAX_BATCH, max_wait_ms: float = MAX_WAIT_MS) -> None:
+    server = await ScoringServer(bank, max_batch, max_wait_ms).start(host, port)
+    print(f"scoring service on http://{host}:{port} ({len(bank)} questions)", flush=True)
+    async with server:
+        await server.serve_forever()
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Serve HR Career Fit scoring over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--bank", default=os.environ.get("HRFIT_BANK"), help="external bank source (see bank_store.py)")
+    parser.add_argument("--max-batch", type=int, default=MAX_BATCH, help="respondents per scoring call")
+    parser.add_argument("--max-wait-ms", type=float, default=MAX_WAIT_MS, help="longest a request waits for batch-mates")
+    args = parser.parse_args(argv)
+
+    bank = BANK
+    if args.bank:
+        from bank_store import load_bank
+
+        bank = load_bank(args.bank)
+    try:
+        asyncio.run(serve(args.host, args.port, bank, args.max_batch, args.max_wait_ms))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,386 @@
+# store.py
+# SQLite-backed result store. Writes are queued and committed in batches by a background thread,
+# so recording a result never blocks a Streamlit rerun or a bulk scoring chunk. Level/top-function
+# counts come from a summary cube (day x cohort x level x top function) and score percentiles from a
+# per-cohort 0.1-point histogram table, both maintained in the same transaction as the inserts, so
+# dashboard queries cost the same at a thousand results as at a million.
+from __future__ import annotations
+
+import logging
+import queue
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from questions import FUNCTIONS
+from scoring import DIMENSIONS, LEVEL_LABELS, AnswerCodes, BatchScores, ScoreResult, _seniority
+
+# Histogram buckets per score point; bucket b holds scores in [b / HIST_RESOLUTION, (b + 1) / HIST_RESOLUTION).
+HIST_RESOLUTION = 10
+HIST_BUCKETS = 100 * HIST_RESOLUTION + 1
+
+_LOG = logging.getLogger(__name__)
+
+def _column(name: str) -> str:
+    return "s_" + re.sub(r"[^a-z0-9]+", "_", name.lower()).strip("_")
+
+DIM_COLUMNS = [_column(d) for d in DIMENSIONS]
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    cohort TEXT NOT NULL DEFAULT '',
+    bank_version TEXT,
+    respondent TEXT,
+    top_function TEXT NOT NULL,
+    level TEXT NOT NULL,
+    seniority REAL NOT NULL,
+    {", ".join(f"{c} REAL NOT NULL" for c in DIM_COLUMNS)},
+    answers BLOB
+);
+CREATE INDEX IF NOT EXISTS results_ts ON results (ts);
+CREATE INDEX IF NOT EXISTS results_cohort_level ON results (cohort, level);
+CREATE INDEX IF NOT EXISTS results_cohort_top ON results (cohort, top_function);
+CREATE INDEX IF NOT EXISTS results_level ON results (level);
+CREATE INDEX IF NOT EXISTS results_top ON results (top_function);
+CREATE TABLE IF NOT EXISTS score_hist (
+    cohort TEXT NOT NULL,
+    dimension TEXT NOT NULL,
+    bucket INTEGER NOT NULL,
+    n INTEGER NOT NULL,
+    PRIMARY KEY (cohort, dimension, bucket)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS cube (
+    day TEXT NOT NULL,
+    cohort TEXT NOT NULL,
+    level TEXT NOT NULL,
+    top_function TEXT NOT NULL,
+    n INTEGER NOT NULL,
+    seniority_sum REAL NOT NULL,
+    PRIMARY KEY (day, cohort, level, top_function)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS cube_cohort ON cube (cohort, day);
+"""
+
+_INSERT = (
+    f"INSERT INTO results (ts, cohort, bank_version, respondent, top_function, level, seniority, {', '.join(DIM_COLUMNS)}, answers) "
+    f"VALUES ({', '.join('?' * (8 + len(DIM_COLUMNS)))})"
+)
+_HIST_UPSERT = (
+    "INSERT INTO score_hist (cohort, dimension, bucket, n) VALUES (?, ?, ?, ?) "
+    "ON CONFLICT (cohort, dimension, bucket) DO UPDATE SET n = n + excluded.n"
+)
+_CUBE_UPSERT = (
+    "INSERT INTO cube (day, cohort, level, top_function, n, seniority_sum) VALUES (?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT (day, cohort, level, top_function) "
+    "DO UPDATE SET n = n + excluded.n, seniority_sum = seniority_sum + excluded.seniority_sum"
+)
+_CUBE_REBUILD = (
+    "INSERT INTO cube (day, cohort, level, top_function, n, seniority_sum) "
+    "SELECT date(ts, 'unixepoch'), cohort, level, top_function, COUNT(*), SUM(seniority) "
+    "FROM results GROUP BY 1, 2, 3, 4"
+)
+CUBE_DIMENSIONS = ("day", "cohort", "level", "top_function")
+
+def day_of(ts: float) -> str:
+    return time.strftime("%Y-%m-%d", time.gmtime(ts))
+
+# One queued write: (ts, cohort, bank version, respondent ids, scores matrix (n x dims), top functions, levels,
+# seniority, answers)
+_Batch = Tuple[
+    float, str, Optional[str], List[Optional[str]], np.ndarray, List[str], List[str], List[float], List[Optional[bytes]]
+]
+
+class ResultStore:
+    def __init__(self, path: str, batch_size: int = 1000, flush_interval: float = 0.5):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+            # Answer codes are positional, so rows carry the ScoringModel.version of the bank they were
+            # recorded with; stores from before that get the column, with NULL (unknown) for old rows.
+            if "bank_version" not in {row[1] for row in conn.execute("PRAGMA table_info(results)")}:
+                conn.execute("ALTER TABLE results ADD COLUMN bank_version TEXT")
+            conn.execute("CREATE INDEX IF NOT EXISTS results_bank ON results (bank_version)")
+            # Stores created before the cube existed get it backfilled once.
+            if conn.execute("SELECT 1 FROM results LIMIT 1").fetchone() and not conn.execute("SELECT 1 FROM cube LIMIT 1").fetchone():
+                conn.execute(_CUBE_REBUILD)
+        self._queue: "queue.Queue[Optional[_Batch]]" = queue.Queue()
+        # First failed commit. Later batches are dropped so the store stays a prefix of what was
+        # queued, and record/flush/close re-raise it so callers never assume the rows were saved.
+        self._error: Optional[BaseException] = None
+        self._writer = threading.Thread(target=self._write_loop, name="hrfit-store", daemon=True)
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    # -- writes ---------------------------------------------------------------------------------
+
+    def record(
+        self,
+        result: ScoreResult,
+        answers: Optional[AnswerCodes] = None,
+        cohort: str = "",
+        respondent: Optional[str] = None,
+        ts: Optional[float] = None,
+        bank_version: Optional[str] = None,
+    ) -> None:
+        """Queue one result; returns immediately. `bank_version` is the ScoringModel.version `answers` are in."""
+        self._check()
+        self._queue.put((
+            ts or time.time(),
+            cohort,
+            bank_version,
+            [respondent],
+            result.vector()[None, :],
+            [result.top_functions[0][0] if result.top_functions else ""],
+            [result.level],
+            [_seniority(result.level_scores)],
+            [None if answers is None else bytes(answers)],
+        ))
+
+    def record_batch(
+        self,
+        scores: BatchScores,
+        answers: Optional[np.ndarray] = None,
+        cohort: str = "",
+        ts: Optional[float] = None,
+        bank_version: Optional[str] = None,
+    ) -> None:
+        """Queue a whole BatchScores (e.g. one bulk scoring chunk); returns immediately."""
+        self._check()
+        ids = scores.respondent_ids
+        n = len(scores)
+        self._queue.put((
+            ts or time.time(),
+            cohort,
+            bank_version,
+            [None] * n if ids is None else [str(i) for i in ids.tolist()],
+            scores.matrix(),
+            np.asarray(FUNCTIONS, dtype=object)[scores.top_function_idx[:, 0]].tolist(),
+            scores.levels.tolist(),
+            scores.seniority.tolist(),
+            [None] * n if answers is None else [row.tobytes() for row in np.asarray(answers, dtype=np.uint8)],
+        ))
+
+    def flush(self) -> None:
+        """Block until everything queued so far is committed; raises if the writer failed."""
+        self._queue.join()
+        self._check()
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._writer.join()
+        self._check()
+
+    def _check(self) -> None:
+        if self._error is not None:
+            raise self._error
+
+    def _write_loop(self) -> None:
+        conn = self._connect()
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                conn.close()
+                return
+            pending = [item]
+            rows = len(item[3])
+            deadline = time.monotonic() + self.flush_interval
+            stop = False
+            while rows < self.batch_size:
+                try:
+                    nxt = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if nxt is None:
+                    stop = True
+                    break
+                pending.append(nxt)
+                rows += len(nxt[3])
+            if self._error is None:
+                try:
+                    self._commit(conn, pending)
+                except Exception as exc:
+                    _LOG.exception("failed to write %d queued result batches", len(pending))
+                    self._error = exc
+            for _ in pending:
+                self._queue.task_done()
+            if stop:
+                self._queue.task_done()
+                conn.close()
+                return
+
+    def _commit(self, conn: sqlite3.Connection, batches: Sequence[_Batch]) -> None:
+        hist: Dict[Tuple[str, int, int], int] = {}
+        cube: Dict[Tuple[str, str, str, str], List[float]] = {}
+        with conn:
+            for ts, cohort, version, ids, scores, tops, levels, seniority, answers in batches:
+                day = day_of(ts)
+                for top, level, sen in zip(tops, levels, seniority):
+                    cell = cube.setdefault((day, cohort, level, top), [0, 0.0])
+                    cell[0] += 1
+                    cell[1] += sen
+                conn.executemany(
+                    _INSERT,
+                    (
+                        (ts, cohort, version, rid, top, level, sen, *row, ans)
+                        for rid, top, level, sen, row, ans in zip(ids, tops, levels, seniority, scores.tolist(), answers)
+                    ),
+                )
+                buckets = np.clip((scores * HIST_RESOLUTION).astype(np.int64), 0, HIST_BUCKETS - 1)
+                for j in range(buckets.shape[1]):
+                    counts = np.bincount(buckets[:, j], minlength=HIST_BUCKETS)
+                    for b in np.flatnonzero(counts).tolist():
+                        key = (cohort, j, b)
+                        hist[key] = hist.get(key, 0) + int(counts[b])
+            conn.executemany(_HIST_UPSERT, ((c, DIMENSIONS[j], b, n) for (c, j, b), n in hist.items()))
+            conn.executemany(_CUBE_UPSERT, (key + (n, sen) for key, (n, sen) in cube.items()))
+
+    # -- queries --------------------------------------------------------------------------------
+
+    def _read(self, sql: str, params: Iterable = ()) -> List[tuple]:
+        conn = self._connect()
+        try:
+            return conn.execute(sql, tuple(params)).fetchall()
+        finally:
+            conn.close()
+
+    def count(self, cohort: Optional[str] = None) -> int:
+        rows = self.rollup((), cohort)
+        return rows[0][0] if rows else 0
+
+    def cohorts(self) -> List[str]:
+        return [r[0] for r in self._read("SELECT DISTINCT cohort FROM cube ORDER BY cohort")]
+
+    def rollup(
+        self,
+        by: Sequence[str],
+        cohort: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+    ) -> List[tuple]:
+        """(*by values, count, mean seniority) rows from the cube; days are inclusive YYYY-MM-DD bounds."""
+        unknown = [d for d in by if d not in CUBE_DIMENSIONS]
+        if unknown:
+            raise ValueError(f"unknown cube dimension(s): {unknown}")
+        where, params = [], []
+        for clause, value in (("cohort = ?", cohort), ("day >= ?", since), ("day <= ?", until)):
+            if value is not None:
+                where.append(clause)
+                params.append(value)
+        cols = ", ".join(by)
+        sql = f"SELECT {cols + ', ' if by else ''}SUM(n), SUM(seniority_sum) / SUM(n) FROM cube"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        if by:
+            sql += f" GROUP BY {cols} ORDER BY {cols}"
+        return [row for row in self._read(sql, params) if row[len(by)]]
+
+    def level_distribution(self, cohort: Optional[str] = None, since: Optional[str] = None, until: Optional[str] = None) -> Dict[str, int]:
+        found = {row[0]: row[1] for row in self.rollup(("level",), cohort, since, until)}
+        return {label: found.get(label, 0) for label in LEVEL_LABELS}
+
+    def top_function_distribution(self, cohort: Optional[str] = None, since: Optional[str] = None, until: Optional[str] = None) -> Dict[str, int]:
+        found = {row[0]: row[1] for row in self.rollup(("top_function",), cohort, since, until)}
+        return {f: found.get(f, 0) for f in FUNCTIONS}
+
+    def histogram(self, dimension: str, cohort: Optional[str] = None) -> np.ndarray:
+        """Counts of 0.1-point score buckets (see HIST_RESOLUTION) for one dimension."""
+        sql = "SELECT bucket, SUM(n) FROM score_hist WHERE dimension = ?"
+        params: List = [dimension]
+        if cohort is not None:
+            sql += " AND cohort = ?"
+            params.append(cohort)
+        counts = np.zeros(HIST_BUCKETS, dtype=np.int64)
+        for bucket, n in self._read(sql + " GROUP BY bucket", params):
+            counts[bucket] = n
+        return counts
+
+    def percentiles(
+        self, dimensions: Sequence[str] = FUNCTIONS, cohort: Optional[str] = None, qs: Sequence[float] = (25, 50, 75, 90)
+    ) -> Dict[str, Dict[float, float]]:
+        """Score percentiles per dimension, read from the histogram (0.1-point resolution)."""
+        out: Dict[str, Dict[float, float]] = {}
+        for dim in dimensions:
+            cum = np.cumsum(self.histogram(dim, cohort))
+            total = cum[-1]
+            out[dim] = {q: float(np.searchsorted(cum, total * q / 100.0)) / HIST_RESOLUTION if total else 0.0 for q in qs}
+        return out
+
+    def vectors(
+        self, cohort: Optional[str] = None, level: Optional[str] = None, batch: int = 50_000
+    ) -> Tuple[List[str], np.ndarray]:
+        """(labels, results x DIMENSIONS score matrix) of stored results, e.g. to index past respondents."""
+        sql = f"SELECT id, respondent, {', '.join(DIM_COLUMNS)} FROM results"
+        where, params = [], []
+        for clause, value in (("cohort = ?", cohort), ("level = ?", level)):
+            if value is not None:
+                where.append(clause)
+                params.append(value)
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        labels: List[str] = []
+        blocks: List[np.ndarray] = []
+        conn = self._connect()
+        try:
+            cur = conn.execute(sql + " ORDER BY id", params)
+            while True:
+                rows = cur.fetchmany(batch)
+                if not rows:
+                    break
+                labels += [rid if rid is not None else f"#{rowid}" for rowid, rid, *_ in rows]
+                blocks.append(np.array([row[2:] for row in rows], dtype=np.float32))
+        finally:
+            conn.close()
+        matrix = np.vstack(blocks) if blocks else np.zeros((0, len(DIMENSIONS)), dtype=np.float32)
+        return labels, matrix
+
+    def iter_answer_codes(
+        self, n_questions: int, cohort: Optional[str] = None, batch: int = 50_000, bank_version: Optional[str] = None
+    ) -> Iterator[np.ndarray]:
+        """Stored answer codes recorded with a bank of n_questions, as (rows x questions) uint8 blocks.
+
+        With `bank_version`, only rows recorded with that ScoringModel.version (i.e. in its question order)."""
+        sql = "SELECT answers FROM results WHERE length(answers) = ?"
+        params: List = [n_questions]
+        for clause, value in (("cohort = ?", cohort), ("bank_version = ?", bank_version)):
+            if value is not None:
+                sql += f" AND {clause}"
+                params.append(value)
+        conn = self._connect()
+        try:
+            cur = conn.execute(sql + " ORDER BY id", params)
+            while True:
+                rows = cur.fetchmany(batch)
+                if not rows:
+                    break
+                yield np.frombuffer(b"".join(r[0] for r in rows), dtype=np.uint8).reshape(len(rows), n_questions)
+        finally:
+            conn.close()
+
+    def answer_codes(
+        self, n_questions: int, cohort: Optional[str] = None, batch: int = 50_000, bank_version: Optional[str] = None
+    ) -> np.ndarray:
+        """(results x questions) uint8 answer codes of stored results recorded with a bank of n_questions."""
+        blocks = list(self.iter_answer_codes(n_questions, cohort, batch, bank_version))
+        return np.vstack(blocks) if blocks else np.zeros((0, n_questions), dtype=np.uint8)
+
+    def recent(self, limit: int = 20, cohort: Optional[str] = None) -> List[tuple]:
+        sql = "SELECT ts, cohort, respondent, top_function, level, seniority FROM results"
+        params: List = []
+        if cohort is not None:
+            sql += " WHERE cohort = ?"
+            params.append(cohort)
+        return self._read(sql + " ORDER BY ts DESC LIMIT ?", params + [limit])
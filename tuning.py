@@ -0,0 +1,344 @@
+# tuning.py
+# What-if analysis and weight tuning over a stored population. A Population keeps the answer codes
+# plus the baseline level scores and classifications. A Candidate then overrides any of func_w /
+# trait_w / level_w, the seniority coefficients or the level cut-offs. Evaluating it recomputes
+# only what the override touches: new coefficients or cut-offs reuse the cached level scores
+# (n x 4 work per candidate), and new weight matrices are re-projected chunk by chunk.
+#
+#   python tuning.py whatif --store results.db --seniority 0.2,0.3,0.3,0.2 --thresholds 45,62,78
+#   python tuning.py whatif --input answers.csv --bank banks/candidate.json
+#   python tuning.py search --store results.db --target 0.15,0.45,0.3,0.1 --candidates 3000 --out tuned.json
+#   python tuning.py whatif --store results.db --candidate tuned.json
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from dataclasses import dataclass, replace
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from bank import BANK, WEIGHT_KEYS, QuestionBank
+from questions import FUNCTIONS, LEVEL_DIMS, TRAITS
+from scoring import BATCH_CHUNK_SIZE, LEVEL_LABELS, LEVEL_THRESHOLDS, SENIORITY_WEIGHTS, _normalize_array, get_model
+
+TUNABLE = ("seniority", "thresholds", "level_w")
+
+@dataclass(frozen=True)
+class Candidate:
+    """Overrides of the scoring parameters; None keeps the bank / scoring.py value."""
+    func_w: Optional[np.ndarray] = None
+    trait_w: Optional[np.ndarray] = None
+    level_w: Optional[np.ndarray] = None
+    # Coefficients in LEVEL_DIMS order, and ascending cut-offs (one fewer than LEVEL_LABELS).
+    seniority: Optional[Tuple[float, ...]] = None
+    thresholds: Optional[Tuple[float, ...]] = None
+
+    def describe(self, bank: QuestionBank = BANK) -> dict:
+        """JSON-ready overrides; weight matrices as {question ID: {dimension: weight}} (non-zero weights)."""
+        out: dict = {}
+        if self.seniority is not None:
+            out["seniority_weights"] = dict(zip(LEVEL_DIMS, self.seniority))
+        if self.thresholds is not None:
+            out["level_thresholds"] = [[c, label] for c, label in zip(self.thresholds, LEVEL_LABELS)]
+        for key, dims in WEIGHT_KEYS:
+            w = getattr(self, key)
+            if w is not None:
+                out[key] = {
+                    qid: {d: v for d, v in zip(dims, row) if v} for qid, row in zip(bank.ids, w.tolist())
+                }
+        return out
+
+    @classmethod
+    def from_dict(cls, doc: dict, bank: QuestionBank = BANK) -> "Candidate":
+        """Inverse of describe(); questions missing from a weight mapping keep no weights."""
+        fields: dict = {}
+        if "seniority_weights" in doc:
+            fields["seniority"] = tuple(float(doc["seniority_weights"][d]) for d in LEVEL_DIMS)
+        if "level_thresholds" in doc:
+            fields["thresholds"] = tuple(float(c) for c, _ in doc["level_thresholds"])
+        for key, dims in WEIGHT_KEYS:
+            if key not in doc:
+                continue
+            unknown = sorted(set(doc[key]) - set(bank.ids))
+            if unknown:
+                raise ValueError(f"{key} has weights for unknown question(s): {', '.join(unknown[:5])}")
+            col = {d: j for j, d in enumerate(dims)}
+            w = np.zeros((len(bank), len(dims)))
+            for qid, weights in doc[key].items():
+                for d, v in weights.items():
+                    if d not in col:
+                        raise ValueError(f"{key}[{qid!r}]: unknown dimension {d!r}")
+                    w[bank.index_of(qid), col[d]] = float(v)
+            fields[key] = w
+        return cls(**fields)
+
+def load_candidate(path: str, bank: QuestionBank = BANK) -> Candidate:
+    with open(path, "r", encoding="utf-8") as f:
+        return Candidate.from_dict(json.load(f), bank)
+
+BASELINE_SENIORITY = tuple(SENIORITY_WEIGHTS[d] for d in LEVEL_DIMS)
+BASELINE_THRESHOLDS = tuple(c for c, _ in LEVEL_THRESHOLDS)
+
+def _scores(codes: np.ndarray, w: np.ndarray) -> np.ndarray:
+    max_possible = 5 * w.sum(axis=0)
+    out = np.empty((len(codes), w.shape[1]))
+    for start in range(0, len(codes), BATCH_CHUNK_SIZE):
+        block = codes[start : start + BATCH_CHUNK_SIZE].astype(np.float64)
+        out[start : start + len(block)] = _normalize_array(block @ w, max_possible)
+    return out
+
+def _top1(codes: np.ndarray, func_w: np.ndarray) -> np.ndarray:
+    out = np.empty(len(codes), dtype=np.intp)
+    for start in range(0, len(codes), BATCH_CHUNK_SIZE):
+        block = codes[start : start + BATCH_CHUNK_SIZE]
+        out[start : start + len(block)] = np.argmax(_scores(block, func_w), axis=1)
+    return out
+
+def _seniority(level_scores: np.ndarray, coefficients: Sequence[float]) -> np.ndarray:
+    # Summed in SENIORITY_WEIGHTS order, like scoring._seniority_array, so the baseline is reproduced bit for bit.
+    out = np.zeros(len(level_scores))
+    for d in SENIORITY_WEIGHTS:
+        j = LEVEL_DIMS.index(d)
+        out = out + coefficients[j] * level_scores[:, j]
+    return out
+
+@dataclass
+class Evaluation:
+    candidate: Candidate
+    level_idx: np.ndarray
+    top_idx: np.ndarray
+    level_counts: np.ndarray
+    top_counts: np.ndarray
+    level_churn: float
+    top_churn: float
+    level_transitions: np.ndarray
+    trait_means: Optional[np.ndarray] = None
+    objective: float = 0.0
+
+    @property
+    def level_shares(self) -> np.ndarray:
+        return self.level_counts / max(1, self.level_counts.sum())
+
+class Population:
+    """Answer codes (respondents x questions, bank order) with baseline classifications cached."""
+
+    def __init__(self, codes: np.ndarray, bank: QuestionBank = BANK):
+        if codes.ndim != 2 or codes.shape[1] != len(bank):
+            raise ValueError(f"expected respondents x {len(bank)} answer codes, got {codes.shape}")
+        self.codes = np.ascontiguousarray(codes, dtype=np.uint8)
+        self.bank = bank
+        self.level_scores = _scores(self.codes, bank.level_w)
+        self._trait_means: Optional[np.ndarray] = None
+        self.baseline: Optional[Evaluation] = None
+        self.baseline = self._classify(Candidate(), self.level_scores, _top1(self.codes, bank.func_w))
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def _classify(self, candidate: Candidate, level_scores: np.ndarray, top_idx: np.ndarray) -> Evaluation:
+        seniority = _seniority(level_scores, candidate.seniority or BASELINE_SENIORITY)
+        level_idx = np.searchsorted(np.asarray(candidate.thresholds or BASELINE_THRESHOLDS), seniority, side="right")
+        n_levels, n_funcs = len(LEVEL_LABELS), len(FUNCTIONS)
+        base = self.baseline
+        if base is None:
+            transitions = np.diag(np.bincount(level_idx, minlength=n_levels))
+            level_churn = top_churn = 0.0
+        else:
+            transitions = np.bincount(base.level_idx * n_levels + level_idx, minlength=n_levels * n_levels).reshape(n_levels, n_levels)
+            level_churn = float(np.mean(base.level_idx != level_idx)) if len(self) else 0.0
+            top_churn = float(np.mean(base.top_idx != top_idx)) if len(self) else 0.0
+        return Evaluation(
+            candidate=candidate,
+            level_idx=level_idx,
+            top_idx=top_idx,
+            level_counts=np.bincount(level_idx, minlength=n_levels),
+            top_counts=np.bincount(top_idx, minlength=n_funcs),
+            level_churn=level_churn,
+            top_churn=top_churn,
+            level_transitions=transitions,
+        )
+
+    def evaluate(self, candidate: Candidate) -> Evaluation:
+        level_scores = self.level_scores if candidate.level_w is None else _scores(self.codes, candidate.level_w)
+        top_idx = self.baseline.top_idx if candidate.func_w is None else _top1(self.codes, candidate.func_w)
+        ev = self._classify(candidate, level_scores, top_idx)
+        if candidate.trait_w is not None:
+            ev.trait_means = _scores(self.codes, candidate.trait_w).mean(axis=0)
+        return ev
+
+    def baseline_trait_means(self) -> np.ndarray:
+        if self._trait_means is None:
+            self._trait_means = _scores(self.codes, self.bank.trait_w).mean(axis=0)
+        return self._trait_means
+
+def fit_thresholds(population: Population, target: Sequence[float], candidate: Candidate = Candidate()) -> Tuple[float, ...]:
+    """Cut-offs that split the candidate's seniority distribution into the target level shares."""
+    level_scores = population.level_scores if candidate.level_w is None else _scores(population.codes, candidate.level_w)
+    seniority = _seniority(level_scores, candidate.seniority or BASELINE_SENIORITY)
+    cum = np.cumsum(np.asarray(target, dtype=np.float64) / np.sum(target))[:-1]
+    return tuple(round(float(c), 2) for c in np.quantile(seniority, cum))
+
+def _objective(ev: Evaluation, target: np.ndarray, churn_penalty: float) -> float:
+    return float(np.abs(ev.level_shares - target).sum() + churn_penalty * ev.level_churn)
+
+def search(
+    population: Population,
+    target: Sequence[float],
+    candidates: int = 2000,
+    tune: Sequence[str] = ("seniority", "thresholds"),
+    churn_penalty: float = 0.0,
+    seed: int = 0,
+    progress=None,
+) -> Evaluation:
+    """Hill-climb towards a target level distribution (shares in LEVEL_LABELS order).
+
+    Each step perturbs the current best: seniority coefficients are redrawn from a Dirichlet centred
+    on them and level_w entries are scaled by lognormal noise. With "thresholds" tuned, cut-offs are
+    refitted to the target quantiles for every proposal. The objective is the L1 distance between
+    level shares and the target, plus churn_penalty x share of respondents whose level changes."""
+    unknown = set(tune) - set(TUNABLE)
+    if unknown:
+        raise ValueError(f"cannot tune {sorted(unknown)}; choose from {', '.join(TUNABLE)}")
+    target_arr = np.asarray(target, dtype=np.float64)
+    if len(target_arr) != len(LEVEL_LABELS):
+        raise ValueError(f"target needs {len(LEVEL_LABELS)} shares, one per level")
+    target_arr = target_arr / target_arr.sum()
+    rng = np.random.default_rng(seed)
+
+    def finish(c: Candidate) -> Evaluation:
+        if "thresholds" in tune:
+            c = replace(c, thresholds=fit_thresholds(population, target_arr, c))
+        ev = population.evaluate(c)
+        ev.objective = _objective(ev, target_arr, churn_penalty)
+        return ev
+
+    best = finish(Candidate(seniority=BASELINE_SENIORITY, thresholds=BASELINE_THRESHOLDS))
+    t0 = time.perf_counter()
+    for i in range(1, candidates):
+        c = best.candidate
+        if "seniority" in tune:
+            c = replace(c, seniority=tuple(rng.dirichlet(np.asarray(c.seniority) * 200).tolist()))
+        if "level_w" in tune:
+            w = c.level_w if c.level_w is not None else population.bank.level_w
+            c = replace(c, level_w=w * np.exp(rng.normal(0.0, 0.1, w.shape)))
+        if c is best.candidate:
+            break  # only thresholds are tuned: the quantile fit is already optimal
+        ev = finish(c)
+        if ev.objective < best.objective:
+            best = ev
+        if progress is not None and i % 500 == 0:
+            rate = i / (time.perf_counter() - t0)
+            print(f"  {i} candidates ({rate * 60:,.0f}/min), best objective {best.objective:.4f}", file=progress)
+    return best
+
+def report(population: Population, ev: Evaluation) -> str:
+    base = population.baseline
+    n = max(1, len(population))
+    lines = [f"{len(population):,} respondents", "", f"{'level':<28}{'baseline':>10}{'candidate':>11}"]
+    for j, label in enumerate(LEVEL_LABELS):
+        lines.append(f"{label:<28}{base.level_counts[j] / n:>10.1%}{ev.level_counts[j] / n:>11.1%}")
+    lines += ["", f"level churn: {ev.level_churn:.2%}    top-function churn: {ev.top_churn:.2%}", "", "level transitions (rows: baseline, columns: candidate)"]
+    short = [label.split(" /")[0] for label in LEVEL_LABELS]
+    lines.append(" " * 12 + "".join(f"{s:>10}" for s in short))
+    for j, s in enumerate(short):
+        lines.append(f"{s:<12}" + "".join(f"{v:>10,}" for v in ev.level_transitions[j].tolist()))
+    if ev.top_churn:
+        lines += ["", f"{'top function':<32}{'baseline':>10}{'candidate':>11}"]
+        for j, name in enumerate(FUNCTIONS):
+            lines.append(f"{name:<32}{base.top_counts[j] / n:>10.1%}{ev.top_counts[j] / n:>11.1%}")
+    if ev.trait_means is not None:
+        lines += ["", "mean trait score shift"]
+        for name, b, c in zip(TRAITS, population.baseline_trait_means().tolist(), ev.trait_means.tolist()):
+            lines.append(f"  {name:<30}{b:>7.1f} -> {c:>5.1f}")
+    return "\n".join(lines)
+
+# -- population loading -------------------------------------------------------------------------
+
+def load_codes_from_file(path: str, bank: QuestionBank = BANK) -> np.ndarray:
+    """Answer codes from any bulk_score.py input file (long/wide CSV or JSONL)."""
+    from bulk_score import iter_code_blocks
+
+    blocks = list(iter_code_blocks(path))
+    return np.vstack(blocks) if blocks else np.zeros((0, len(bank)), dtype=np.uint8)
+
+def _candidate_from_bank(path: str, bank: QuestionBank) -> Candidate:
+    from bank_store import read_source
+
+    other = read_source(path)
+    missing = [qid for qid in bank.ids if qid not in other.ids]
+    if missing:
+        raise ValueError(f"{path}: candidate bank lacks {len(missing)} question(s), e.g. {missing[0]}")
+    rows = [other.index_of(qid) for qid in bank.ids]
+    return Candidate(func_w=other.func_w[rows], trait_w=other.trait_w[rows], level_w=other.level_w[rows])
+
+def _floats(text: Optional[str]) -> Optional[Tuple[float, ...]]:
+    return tuple(float(v) for v in text.split(",")) if text else None
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="What-if analysis and weight tuning for HR Career Fit scoring.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name in ("whatif", "search"):
+        p = sub.add_parser(name)
+        src = p.add_mutually_exclusive_group(required=True)
+        src.add_argument("--store", help="SQLite result store with stored answers (see store.py)")
+        src.add_argument("--input", help="answers file in any bulk_score.py input format")
+        p.add_argument("--cohort", help="restrict a --store population to one cohort")
+    whatif = sub.choices["whatif"]
+    base = whatif.add_mutually_exclusive_group()
+    base.add_argument("--bank", help="candidate bank source (JSON) with edited func_w/trait_w/level_w")
+    base.add_argument("--candidate", help="candidate written by search --out")
+    whatif.add_argument("--seniority", help=f"coefficients for {', '.join(LEVEL_DIMS)}")
+    whatif.add_argument("--thresholds", help="ascending level cut-offs, e.g. 45,60,75")
+    srch = sub.choices["search"]
+    srch.add_argument("--target", required=True, help=f"level shares for {', '.join(LEVEL_LABELS)}")
+    srch.add_argument("--candidates", type=int, default=2000)
+    srch.add_argument("--tune", default="seniority,thresholds", help=f"comma-separated subset of {', '.join(TUNABLE)}")
+    srch.add_argument("--churn-penalty", type=float, default=0.0, help="objective weight on level churn")
+    srch.add_argument("--seed", type=int, default=0)
+    srch.add_argument("--out", help="write the best candidate (coefficients, cut-offs, tuned weights) to this JSON file")
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    if args.store:
+        from store import ResultStore
+
+        store = ResultStore(args.store)
+        try:
+            codes = store.answer_codes(len(BANK), args.cohort, bank_version=get_model(BANK).version)
+        finally:
+            store.close()
+    else:
+        codes = load_codes_from_file(args.input)
+    population = Population(codes)
+    print(f"loaded {len(population):,} respondents in {time.perf_counter() - t0:.2f}s", file=sys.stderr)
+
+    if args.command == "whatif":
+        if args.bank:
+            candidate = _candidate_from_bank(args.bank, BANK)
+        elif args.candidate:
+            candidate = load_candidate(args.candidate)
+        else:
+            candidate = Candidate()
+        if args.seniority:
+            candidate = replace(candidate, seniority=_floats(args.seniority))
+        if args.thresholds:
+            candidate = replace(candidate, thresholds=_floats(args.thresholds))
+        print(report(population, population.evaluate(candidate)))
+        return
+
+    t0 = time.perf_counter()
+    best = search(
+        population, _floats(args.target), args.candidates, args.tune.split(","), args.churn_penalty, args.seed, sys.stderr
+    )
+    print(f"searched {args.candidates:,} candidates in {time.perf_counter() - t0:.1f}s; objective {best.objective:.4f}", file=sys.stderr)
+    print(json.dumps(best.candidate.describe(), indent=2))
+    print(report(population, best))
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(best.candidate.describe(), f, indent=2)
+
+if __name__ == "__main__":
+    main()